@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: Instance.from_json without cache, with a cold cache and with a warm cache.
+
+Every instance of downloads/instances is loaded three times: without the
+cache, then into an empty temporary cache folder (cold: parse, compile and
+write the entry), then from that folder (warm). Times are grouped by
+instance size.
+
+Usage:
+    python benchmarks/bench_cache.py [--limit 264]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = VALIDATOR_DIR.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+from data.cache import CACHE_DIR_ENV, NO_CACHE_ENV  # noqa: E402
+from data.instance import Instance  # noqa: E402
+
+INSTANCES_DIR = REPO_ROOT / 'downloads' / 'instances'
+
+
+def load_time(path: Path, use_cache: bool) -> float:
+    start = time.perf_counter()
+    Instance.from_json(str(path), use_cache=use_cache).compile()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Instance.from_json: no cache, cold cache, warm cache')
+    parser.add_argument('--limit', type=int, default=None, help='Number of instance files to load')
+    args = parser.parse_args()
+
+    files = sorted(INSTANCES_DIR.glob('*.json'))[:args.limit]
+    times = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    os.environ.pop(NO_CACHE_ENV, None)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ[CACHE_DIR_ENV] = directory
+        for path in files:
+            size = int(path.stem.split('_')[1])
+            group = times[size]
+            group[0] += 1
+            group[1] += load_time(path, False)
+            group[2] += load_time(path, True)
+            group[3] += load_time(path, True)
+
+    print(f'{"size":>5} {"files":>6} {"no cache ms":>12} {"cold ms":>9} {"warm ms":>9} {"speedup":>8}')
+    total = [0.0, 0.0, 0.0]
+    for size in sorted(times):
+        count, uncached, cold, warm = times[size]
+        total = [total[0] + uncached, total[1] + cold, total[2] + warm]
+        print(f'{size:>5} {count:>6} {uncached / count * 1e3:>12.2f} {cold / count * 1e3:>9.2f} '
+              f'{warm / count * 1e3:>9.2f} {uncached / warm:>7.2f}x')
+    print(f'total: no cache {total[0]:.3f}s, cold {total[1]:.3f}s, warm {total[2]:.3f}s, '
+          f'speedup {total[0] / total[2]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: rule-by-rule State.evaluate vs single-sweep State.evaluate_fused.
+
+Every shift of the archived solutions (sols/) is evaluated with both
+implementations, after checking that they agree. Shifts are grouped by
+their number of legs and the mean time per shift is reported per group.
+
+Usage:
+    python benchmarks/bench_fused.py [--repeat 5] [--limit 65]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = VALIDATOR_DIR.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+from data.instance import Instance  # noqa: E402
+from data.solution import Solution  # noqa: E402
+from data.employee import State  # noqa: E402
+
+SOLUTIONS_DIR = REPO_ROOT / 'sols'
+INSTANCES_DIR = REPO_ROOT / 'downloads' / 'instances'
+
+
+def load_shifts(limit: int) -> dict:
+    """Return the employees of the archived solutions grouped by number of legs."""
+    shifts = defaultdict(list)
+    for solution_file in sorted(SOLUTIONS_DIR.glob('*.csv'))[:limit]:
+        instance = Instance.from_json(str(INSTANCES_DIR / f'{solution_file.stem}.json'))
+        solution = Solution.from_file(instance, solution_file)
+        for employee in solution.employees:
+            if State(employee).evaluate() != State(employee).evaluate_fused():
+                raise AssertionError(f'{solution_file.stem} {employee.name}: fused result differs')
+            shifts[len(employee.legs)].append(employee)
+    return shifts
+
+
+def time_per_shift(employees: list, fused: bool, repeat: int) -> float:
+    """Best-of-repeat mean time (seconds) to evaluate one shift."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for employee in employees:
+            state = State(employee)
+            if fused:
+                state.evaluate_fused()
+            else:
+                state.evaluate()
+        best = min(best, time.perf_counter() - start)
+    return best / len(employees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='State.evaluate vs State.evaluate_fused')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is kept)')
+    parser.add_argument('--limit', type=int, default=65, help='Number of solution files to load')
+    args = parser.parse_args()
+
+    shifts = load_shifts(args.limit)
+    print(f'{"legs":>5} {"shifts":>7} {"reference us":>13} {"fused us":>9} {"speedup":>8}')
+    total_reference = total_fused = 0.0
+    for n_legs in sorted(shifts):
+        employees = shifts[n_legs]
+        reference = time_per_shift(employees, False, args.repeat)
+        fused = time_per_shift(employees, True, args.repeat)
+        total_reference += reference * len(employees)
+        total_fused += fused * len(employees)
+        print(f'{n_legs:>5} {len(employees):>7} {reference * 1e6:>13.2f} {fused * 1e6:>9.2f} '
+              f'{reference / fused:>7.2f}x')
+    print(f'total: reference {total_reference:.3f}s, fused {total_fused:.3f}s, '
+          f'speedup {total_reference / total_fused:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
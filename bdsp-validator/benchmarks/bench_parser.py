@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: csv.reader(QUOTE_NONNUMERIC) vs the byte parser of data/matrix.py.
+
+The largest archived solutions (sols/) are parsed with both readers, after
+checking that they extract the same ones. --tile repeats the rows of each
+file to emulate the larger attachments (up to MAX_ATTACHMENT_BYTES).
+
+Usage:
+    python benchmarks/bench_parser.py [--files 5] [--repeat 5] [--tile 1]
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = VALIDATOR_DIR.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+from data.matrix import parse_matrix  # noqa: E402
+
+SOLUTIONS_DIR = REPO_ROOT / 'sols'
+INSTANCES_DIR = REPO_ROOT / 'downloads' / 'instances'
+
+
+def parse_csv(data: bytes) -> list:
+    """The reader Solution.from_file used before data/matrix.py."""
+    rows = []
+    for row in csv.reader(io.StringIO(data.decode()), quoting=csv.QUOTE_NONNUMERIC):
+        rows.append([index for index, value in enumerate(row) if value == 1])
+    return rows
+
+
+def best_time(function, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='csv reader vs byte parser')
+    parser.add_argument('--files', type=int, default=5, help='Number of (largest) solution files')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is kept)')
+    parser.add_argument('--tile', type=int, default=1, help='Repeat the rows of each file this many times')
+    args = parser.parse_args()
+
+    files = sorted(SOLUTIONS_DIR.glob('*.csv'), key=lambda p: p.stat().st_size, reverse=True)[:args.files]
+    print(f'{"file":<24} {"MB":>6} {"rows":>6} {"csv ms":>9} {"bytes ms":>9} {"speedup":>8}')
+    total_csv = total_bytes = 0.0
+    for solution_file in files:
+        data = solution_file.read_bytes()
+        if not data.endswith(b'\n'):
+            data += b'\n'
+        data *= args.tile
+        with open(INSTANCES_DIR / f'{solution_file.stem}.json') as f:
+            n_legs = len(json.load(f)['legs'])
+        rows = parse_matrix(data, n_legs)
+        if rows != parse_csv(data):
+            raise AssertionError(f'{solution_file.stem}: parsers disagree')
+        csv_time = best_time(lambda: parse_csv(data), args.repeat)
+        bytes_time = best_time(lambda: parse_matrix(data, n_legs), args.repeat)
+        total_csv += csv_time
+        total_bytes += bytes_time
+        print(f'{solution_file.stem:<24} {len(data) / 1e6:>6.2f} {len(rows):>6} {csv_time * 1e3:>9.2f} '
+              f'{bytes_time * 1e3:>9.2f} {csv_time / bytes_time:>7.2f}x')
+    print(f'total: csv {total_csv:.3f}s, bytes {total_bytes:.3f}s, speedup {total_csv / total_bytes:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
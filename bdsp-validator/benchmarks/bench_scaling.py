@@ -0,0 +1,121 @@
+"""
+Scaling benchmark: time and peak memory against the instance size.
+
+For each size of --sizes, a stress instance and its feasible solution are
+generated (generate.py, same --seed and --stations for every size) in a
+temporary folder, then timed through the stages:
+    load      Instance.from_json (instance cache disabled)
+    parse     Solution.from_file
+    evaluate  Solution.evaluate
+
+Times are the best of --repeat untraced runs. The peak memory of each
+stage is measured in one more run, traced by tracemalloc (StageTimer, utils/profile.py),
+whose overhead would distort the times. The results are printed as a table
+with a bar of the time per leg of each stage, which stays flat if the
+stage scales linearly, and written as CSV or JSON with --output.
+
+Usage:
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --sizes 1000,2500,5000,10000 --stations 400 --output scaling.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+from data.instance import Instance  # noqa: E402
+from data.matrix import format_matrix  # noqa: E402
+from data.solution import Solution  # noqa: E402
+from generate import feasible_solution, generate_instance  # noqa: E402
+from utils.profile import StageTimer  # noqa: E402
+
+STAGES = ('load', 'parse', 'evaluate')
+BAR_WIDTH = 30
+
+
+def best_time(function, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(n_legs: int, n_stations: int, seed: int, repeat: int, directory: Path) -> list:
+    """Rows {legs, shifts, stage, seconds, us_per_leg, peak_kb} of the stages for one size."""
+    generated = generate_instance(n_legs, n_stations, seed)
+    instance_file = directory / f'{generated.name}.json'
+    solution_file = directory / f'{generated.name}.csv'
+    generated.to_json(str(instance_file))
+    solution_file.write_bytes(format_matrix(feasible_solution(generated, seed), n_legs))
+
+    instance = Instance.from_json(str(instance_file), use_cache=False)
+    solution = Solution.from_file(instance, solution_file)
+    stages = {
+        'load': lambda: Instance.from_json(str(instance_file), use_cache=False),
+        'parse': lambda: Solution.from_file(instance, solution_file),
+        'evaluate': solution.evaluate,
+    }
+    seconds = {stage: best_time(function, repeat) for stage, function in stages.items()}
+
+    timer = StageTimer(memory=True)
+    for stage, function in stages.items():
+        with timer.stage(stage):
+            function()
+    tracemalloc.stop()
+
+    return [{'legs': n_legs, 'shifts': len(solution.employees), 'stage': stage,
+             'seconds': round(seconds[stage], 6), 'us_per_leg': round(seconds[stage] / n_legs * 1e6, 3),
+             'peak_kb': round(timer.peak_kb[stage], 1)}
+            for stage in STAGES]
+
+
+def print_table(rows: list) -> None:
+    for stage in STAGES:
+        stage_rows = [row for row in rows if row['stage'] == stage]
+        longest = max(row['us_per_leg'] for row in stage_rows)
+        print(f'\n{stage}')
+        print(f'{"legs":>7} {"shifts":>7} {"ms":>10} {"us/leg":>8} {"peak KB":>10}  time per leg')
+        for row in stage_rows:
+            bar = '#' * max(1, round(row['us_per_leg'] / longest * BAR_WIDTH))
+            print(f'{row["legs"]:>7} {row["shifts"]:>7} {row["seconds"] * 1e3:>10.2f} {row["us_per_leg"]:>8.2f} '
+                  f'{row["peak_kb"]:>10.1f}  {bar}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and peak memory against the instance size')
+    parser.add_argument('--sizes', default='1000,2000,5000,10000', help='Comma-separated numbers of legs')
+    parser.add_argument('--stations', type=int, default=200, help='Number of stations of the instances')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated instances')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per stage (best is kept)')
+    parser.add_argument('--output', default=None, help='Write the results to this file (.json, or CSV otherwise)')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_legs in sorted(int(size) for size in args.sizes.split(',') if size):
+            rows.extend(measure(n_legs, args.stations, args.seed, args.repeat, Path(directory)))
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            if args.output.endswith('.json'):
+                json.dump({'stations': args.stations, 'seed': args.seed, 'repeat': args.repeat, 'results': rows},
+                          f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
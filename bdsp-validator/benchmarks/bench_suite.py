@@ -0,0 +1,276 @@
+"""
+Benchmark suite over the bundled instances (downloads/instances) and solutions (sols/).
+
+Stages:
+    load      Instance.from_json, every instance file
+    parse     Solution.from_file, every archived solution
+    evaluate  Solution.evaluate
+    validate  Validator(...).validate() (parse, evaluate and checks)
+    folder    FolderValidator.validate_all on a folder of the solutions of each group
+
+The suite runs --repeat rounds, each timing every file once (garbage
+collection off, as timeit), and keeps the best time of each file: the
+least noisy estimate of its cost, and spread over the whole run, so a
+slow period of the machine spoils some rounds only. Times are
+summed per group (source family and size, e.g. realistic_100) and reported
+with their throughput in legs/s and shifts/s (employees of the solutions).
+The instance cache is disabled unless --cache is given.
+
+With --baseline, the total time of each stage is compared to the same
+stage of a previous --output, and the exit code is 1 if any stage is more
+than --threshold slower and more than --min-delta-ms slower: a relative
+change of a stage total of a few milliseconds is timer noise.
+
+Usage:
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.15
+    python benchmarks/bench_suite.py --stages load,parse --family realistic --size 250
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = VALIDATOR_DIR.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+import validator as _validator_module  # noqa: E402
+
+if not hasattr(_validator_module, 'logger'):
+    _validator_module.logger = logging.getLogger('bdsp-validator')
+_validator_module.logger.setLevel(logging.CRITICAL)
+
+from data.cache import NO_CACHE_ENV  # noqa: E402
+from data.instance import Instance  # noqa: E402
+from data.solution import Solution  # noqa: E402
+from validator import FolderValidator, Validator  # noqa: E402
+
+SOLUTIONS_DIR = REPO_ROOT / 'sols'
+INSTANCES_DIR = REPO_ROOT / 'downloads' / 'instances'
+STAGES = ('load', 'parse', 'evaluate', 'validate', 'folder')
+# Bump when the JSON layout changes.
+FORMAT_VERSION = 1
+
+
+def group_of(name: str) -> str:
+    """realistic_100_3 -> realistic_100"""
+    return name.rsplit('_', 1)[0]
+
+
+def run_time(function) -> float:
+    """Time of one call of function, with garbage collection off."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class Suite:
+    """Best times of the stages, per file: stage -> (group, file) -> [legs, shifts, seconds].
+    Each run_* call is one round, timing every file once."""
+
+    def __init__(self, use_cache: bool) -> None:
+        self.use_cache = use_cache
+        self.times = {stage: {} for stage in STAGES}
+        self.instances = {}
+        self.shifts = {}
+
+    def add(self, stage: str, group: str, name: str, legs: int, shifts: int, seconds: float) -> None:
+        best = self.times[stage].setdefault((group, name), [legs, shifts, seconds])
+        best[2] = min(best[2], seconds)
+
+    def instance(self, name: str) -> Instance:
+        if name not in self.instances:
+            self.instances[name] = Instance.from_json(str(INSTANCES_DIR / f'{name}.json'), use_cache=self.use_cache)
+        return self.instances[name]
+
+    def shift_count(self, path: Path) -> int:
+        """Number of employees of the solution file."""
+        if path not in self.shifts:
+            self.shifts[path] = len(Solution.from_file(self.instance(path.stem), path).employees)
+        return self.shifts[path]
+
+    def run_load(self, instance_files: list) -> None:
+        for path in instance_files:
+            seconds = run_time(lambda: Instance.from_json(str(path), use_cache=self.use_cache))
+            self.add('load', group_of(path.stem), path.stem, len(self.instance(path.stem).legs), 0, seconds)
+
+    def run_solutions(self, solution_files: list, stages: list) -> None:
+        for path in solution_files:
+            instance = self.instance(path.stem)
+            solution = Solution.from_file(instance, path)
+            group, legs, shifts = group_of(path.stem), len(instance.legs), len(solution.employees)
+            if 'parse' in stages:
+                self.add('parse', group, path.stem, legs, shifts, run_time(lambda: Solution.from_file(instance, path)))
+            if 'evaluate' in stages:
+                self.add('evaluate', group, path.stem, legs, shifts, run_time(solution.evaluate))
+            if 'validate' in stages:
+                self.add('validate', group, path.stem, legs, shifts,
+                         run_time(lambda: Validator(instance, path).validate()))
+
+    def run_folder(self, solution_files: list) -> None:
+        """FolderValidator over the solutions of each group, copied as
+        <name>_bks.csv (the validator reads the instance name from the file name)."""
+        groups = defaultdict(list)
+        for path in solution_files:
+            groups[group_of(path.stem)].append(path)
+        _validator_module.INSTANCE_FOLDER = INSTANCES_DIR
+        with tempfile.TemporaryDirectory() as directory:
+            for group, paths in groups.items():
+                folder = Path(directory) / group
+                folder.mkdir()
+                for path in paths:
+                    shutil.copyfile(path, folder / f'{path.stem}_bks.csv')
+
+                def validate_folder():
+                    folder_validator = FolderValidator(str(folder), cache=False)
+                    folder_validator.output_file = str(Path(directory) / f'{group}.csv')
+                    folder_validator.validate_all()
+
+                seconds = run_time(validate_folder)
+                for path in paths:
+                    # The folder time is counted once per group, on its first file.
+                    self.add('folder', group, path.stem, len(self.instance(path.stem).legs),
+                             self.shift_count(path), seconds if path == paths[0] else 0.0)
+
+    def results(self) -> dict:
+        results = {}
+        for stage, files in self.times.items():
+            if not files:
+                continue
+            groups = defaultdict(lambda: [0, 0, 0, 0.0])
+            for (group, _), (legs, shifts, seconds) in files.items():
+                totals = groups[group]
+                totals[0] += 1
+                totals[1] += legs
+                totals[2] += shifts
+                totals[3] += seconds
+            entries = {group: self.entry(*groups[group]) for group in sorted(groups, key=sort_key)}
+            total = [sum(values[i] for values in groups.values()) for i in range(4)]
+            results[stage] = {'groups': entries, 'total': self.entry(*total)}
+        return results
+
+    @staticmethod
+    def entry(files: int, legs: int, shifts: int, seconds: float) -> dict:
+        return {
+            'files': files,
+            'legs': legs,
+            'shifts': shifts,
+            'seconds': round(seconds, 6),
+            'legs_per_s': round(legs / seconds, 1) if seconds else None,
+            'shifts_per_s': round(shifts / seconds, 1) if seconds and shifts else None,
+        }
+
+
+def sort_key(group: str) -> tuple:
+    family, size = group.rsplit('_', 1)
+    return family, int(size)
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """Stages whose total time is more than threshold (relative) and more
+    than min_delta seconds slower than in baseline."""
+    regressions = []
+    print(f'\n{"stage":<10} {"baseline s":>11} {"now s":>9} {"change":>8}')
+    for stage, result in results.items():
+        if stage not in baseline.get('results', {}):
+            continue
+        before = baseline['results'][stage]['total']['seconds']
+        now = result['total']['seconds']
+        change = now / before - 1 if before else 0.0
+        slower = change > threshold and now - before > min_delta
+        flag = '  SLOWER' if slower else ''
+        print(f'{stage:<10} {before:>11.3f} {now:>9.3f} {change:>+7.1%}{flag}')
+        if slower:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite over the bundled instances and solutions')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f'Comma-separated stages among {STAGES}')
+    parser.add_argument('--family', default=None, help='Only the files of this family (e.g. realistic)')
+    parser.add_argument('--size', type=int, default=None, help='Only the files of this size (e.g. 250)')
+    parser.add_argument('--repeat', type=int, default=7, help='Rounds over the files (best time of each file is kept)')
+    parser.add_argument('--cache', action='store_true', help='Load instances through the instance cache')
+    parser.add_argument('--output', default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='JSON file of a previous --output to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown of a stage total that fails the comparison (default 0.10)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='Slowdowns of a stage total under this many ms never fail the comparison (default 5)')
+    args = parser.parse_args()
+
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f'Unknown stages {sorted(unknown)}')
+    if not args.cache:
+        os.environ[NO_CACHE_ENV] = '1'
+
+    def selected(path: Path) -> bool:
+        family, size = group_of(path.stem).rsplit('_', 1)
+        return (args.family is None or family == args.family) and (args.size is None or int(size) == args.size)
+
+    instance_files = [path for path in sorted(INSTANCES_DIR.glob('*.json')) if selected(path)]
+    solution_files = [path for path in sorted(SOLUTIONS_DIR.glob('*.csv')) if selected(path)]
+
+    suite = Suite(args.cache)
+    for _ in range(args.repeat):
+        if 'load' in stages:
+            suite.run_load(instance_files)
+        if {'parse', 'evaluate', 'validate'} & set(stages):
+            suite.run_solutions(solution_files, stages)
+        if 'folder' in stages:
+            suite.run_folder(solution_files)
+    results = suite.results()
+
+    for stage, result in results.items():
+        print(f'\n{stage}')
+        print(f'{"group":<28} {"files":>5} {"legs":>7} {"shifts":>7} {"ms":>10} {"legs/s":>11} {"shifts/s":>10}')
+        for group, entry in list(result['groups'].items()) + [('total', result['total'])]:
+            shifts_per_s = f'{entry["shifts_per_s"]:>10.0f}' if entry['shifts_per_s'] else f'{"-":>10}'
+            print(f'{group:<28} {entry["files"]:>5} {entry["legs"]:>7} {entry["shifts"]:>7} '
+                  f'{entry["seconds"] * 1e3:>10.2f} {entry["legs_per_s"]:>11.0f} {shifts_per_s}')
+
+    report = {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'cache': args.cache,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('repeat', args.repeat) < args.repeat:
+            print(f'\nWarning: the baseline kept the best of {baseline["repeat"]} repetitions only, '
+                  f'its times are noisier than these', file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1e3)
+        if regressions:
+            print(f'\n{len(regressions)} stage(s) more than {args.threshold:.0%} and {args.min_delta_ms:g} ms slower: '
+                  f'{", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
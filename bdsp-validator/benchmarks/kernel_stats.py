@@ -0,0 +1,68 @@
+"""
+Kernel counters: where the evaluation spends its time.
+
+Every shift of the archived solutions (sols/) is evaluated with the
+instrumented kernel (data/instrument.py). The calls and time of each
+State.evaluate* method, the number of shifts in which each hard-constraint
+rule fires and the histogram of the shift lengths are printed, or written
+as JSON with --json.
+
+By default the shifts go through the production path (evaluate_fused,
+timed as a whole). With --rules they go through the rule-by-rule
+reference State.evaluate, timing each rule: its times are those of the
+reference, not of the default path.
+
+Usage:
+    python benchmarks/kernel_stats.py [--limit 65] [--rules] [--json stats.json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = VALIDATOR_DIR.parent
+sys.path.insert(0, str(VALIDATOR_DIR))
+
+from data.instance import Instance  # noqa: E402
+from data.instrument import KernelCounters, instrumented  # noqa: E402
+from data.solution import Solution  # noqa: E402
+
+SOLUTIONS_DIR = REPO_ROOT / 'sols'
+INSTANCES_DIR = REPO_ROOT / 'downloads' / 'instances'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Counters of the instrumented evaluation kernel')
+    parser.add_argument('--limit', type=int, default=65, help='Number of solution files to evaluate')
+    parser.add_argument('--json', type=str, default=None, help='Write the counters to this JSON file')
+    parser.add_argument('--rules', action='store_true',
+                        help='Evaluate with the rule-by-rule reference State.evaluate, timing each rule')
+    args = parser.parse_args()
+
+    counters = KernelCounters()
+    for solution_file in sorted(SOLUTIONS_DIR.glob('*.csv'))[:args.limit]:
+        instance = Instance.from_json(str(INSTANCES_DIR / f'{solution_file.stem}.json'))
+        solution = Solution.from_file(instance, solution_file)
+        with instrumented(counters, rules=args.rules):
+            solution.evaluate()
+    stats = counters.as_dict()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats, f, indent=2)
+    shift_method = 'evaluate' if args.rules else 'evaluate_fused'
+    total = stats['methods'][shift_method]['seconds']
+    print(f'{stats["shifts"]} shifts, {shift_method} {total:.3f}s (inclusive times)')
+    print(f'{"method":<30} {"calls":>8} {"ms":>9} {"share":>7}')
+    for method, entry in stats['methods'].items():
+        print(f'{method:<30} {entry["calls"]:>8} {entry["seconds"] * 1e3:>9.2f} '
+              f'{entry["seconds"] / total:>6.1%}')
+    print('penalty fires (shifts): ' + ', '.join(f'{name} {count}' for name, count in stats['penalties'].items()))
+    print('shift lengths (legs: shifts): ' + ', '.join(f'{n_legs}: {count}'
+                                                       for n_legs, count in stats['shift_lengths'].items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+BDSP solution format converter
+
+Converts a solution between the dense 0/1 matrix (one row per employee, one
+column per leg) and the sparse format (a "# bdsp-sparse legs=<l>" header,
+then one line per employee with the indices of its legs). Both formats are
+read by Solution.from_file and give the same evaluation.
+
+Usage:
+    # Dense matrix to sparse (the number of legs is the width of the rows):
+    python convert.py -i solution.csv -o solution.sparse
+
+    # Sparse to dense (the number of legs is read from the header):
+    python convert.py -i solution.sparse -o solution.csv
+
+    # Check the number of legs against an instance:
+    python convert.py -i solution.csv -o solution.sparse -j instance.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from data.matrix import (MatrixFormatError, SPARSE_HEADER, format_matrix, format_sparse,
+                         is_sparse, parse_matrix, parse_sparse)
+
+
+def count_legs(data: bytes) -> int:
+    """Number of legs of a solution file: the legs= of the sparse header,
+    or the width of the first row of a matrix."""
+    if is_sparse(data):
+        header = data.lstrip().splitlines()[0].split()
+        if len(header) < 3 or not header[2].startswith(b'legs='):
+            raise MatrixFormatError(1, f'{SPARSE_HEADER.decode()} header without legs=<number of legs>')
+        return int(header[2][len(b'legs='):])
+    for line in data.splitlines():
+        if line.strip():
+            return line.count(b',') + 1
+    return 0
+
+
+def convert(data: bytes, n_legs: int = None) -> bytes:
+    """Convert a dense solution to sparse, or a sparse one to dense.
+
+    Parameters
+    ----------
+    data : bytes
+        content of the solution file
+    n_legs : int
+        number of legs of the instance, taken from the file when None
+
+    Returns
+    -------
+    bytes
+        the solution in the other format
+    """
+    if n_legs is None:
+        n_legs = count_legs(data)
+    if is_sparse(data):
+        return format_matrix(parse_sparse(data, n_legs), n_legs)
+    return format_sparse(parse_matrix(data, n_legs), n_legs)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description='BDSP solution format converter (dense <-> sparse)')
+    parser.add_argument('--input', '-i', required=True, type=str,
+                        help='Solution file, dense or sparse (detected from the content)')
+    parser.add_argument('--output', '-o', required=True, type=str,
+                        help='Converted solution file')
+    parser.add_argument('--instance_json', '-j', required=False, type=str,
+                        help='Instance JSON file, to check the number of legs')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    data = Path(args.input).read_bytes()
+    n_legs = None
+    if args.instance_json:
+        with open(args.instance_json) as f:
+            n_legs = len(json.load(f)['legs'])
+    try:
+        converted = convert(data, n_legs)
+    except MatrixFormatError as e:
+        print(f'{args.input}: {e}', file=sys.stderr)
+        return 1
+    Path(args.output).write_bytes(converted)
+    print(f'{args.input} ({len(data)} bytes) -> {args.output} ({len(converted)} bytes)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
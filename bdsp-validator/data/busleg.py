@@ -33,6 +33,11 @@ class BusLeg:
     def drive(self) -> int:
         return self.end - self.start
 
+    def as_dict(self) -> dict:
+        """The leg as an item of the "legs" list of an instance JSON file (see Instance.to_json)."""
+        return {"tour": self.tour, "start": self.start, "end": self.end,
+                "startPos": self.start_pos, "endPos": self.end_pos}
+
     def register_employee(self, employee: Employee) -> None:
         self.employee = employee 
 
@@ -0,0 +1,218 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+# Environment variables: cache folder, size bound in MB (of all the caches together),
+# and BDSP_NO_CACHE=1 to disable it.
+CACHE_DIR_ENV = 'BDSP_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'BDSP_CACHE_MAX_MB'
+NO_CACHE_ENV = 'BDSP_NO_CACHE'
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'bdsp'
+DEFAULT_MAX_MB = 256
+# Fraction of max_bytes evict deletes down to, so that a full cache is not
+# scanned again on the next put.
+EVICT_TO = 0.9
+# Root of the validator sources (bdsp-validator/).
+VALIDATOR_DIR = Path(__file__).resolve().parent.parent
+
+
+@lru_cache(maxsize=None)
+def sources_version(*patterns: str) -> str:
+    """sha256 of the validator sources matching the glob patterns (relative to bdsp-validator/)."""
+    files = sorted({file for pattern in patterns for file in VALIDATOR_DIR.glob(pattern)})
+    return DiskCache.key(b''.join(file.relative_to(VALIDATOR_DIR).as_posix().encode() + b'\0' + file.read_bytes()
+                                  for file in files))
+
+
+def data_version() -> str:
+    """sha256 of the data/*.py sources, so that any change to them invalidates the instance cache."""
+    return sources_version('data/*.py')
+
+
+class DiskCache(ABC):
+    """Size-bounded folder of cache entries, one file per key.
+
+    Every cache lives in its subfolder of the cache root, and all of them
+    share the max_bytes budget of the root. Entries are written atomically.
+    Reading an entry refreshes its mtime; when the entries of all caches
+    grow over max_bytes, the least recently used ones are deleted, down to
+    EVICT_TO of max_bytes. The size of the entries is scanned once, then
+    kept up to date by put, so a put costs no scan of the folder until the
+    caches outgrow max_bytes. The entries written by other processes are
+    only counted at the next scan.
+    Subclasses choose the serialization (load, dump), suffix and subfolder.
+    """
+
+    suffix = '.entry'
+    subfolder = ''
+    # Size of the entries of every cache root, shared by the caches of the
+    # process; a root is absent until evict scans it.
+    totals = {}
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.directory = self.root / self.subfolder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def settings() -> tuple:
+        """(folder, max bytes) from the BDSP_* environment variables, None if the cache is disabled."""
+        if os.environ.get(NO_CACHE_ENV, '') not in ('', '0'):
+            return None
+        directory = os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        max_mb = float(os.environ.get(CACHE_MAX_MB_ENV) or DEFAULT_MAX_MB)
+        return Path(directory), int(max_mb * 1024 * 1024)
+
+    @staticmethod
+    def key(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    @abstractmethod
+    def load(self, f):
+        """Read an entry from the binary file f."""
+
+    @abstractmethod
+    def dump(self, entry, f) -> None:
+        """Write the entry to the binary file f."""
+
+    def path(self, key: str) -> Path:
+        return self.directory / f'{key}{self.suffix}'
+
+    def get(self, key: str):
+        """Return the entry stored under key, None if absent or unreadable."""
+        path = self.path(key)
+        try:
+            with path.open('rb') as f:
+                entry = self.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Truncated or foreign file: drop it and rebuild.
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry) -> None:
+        """Store the entry under key, then evict down to max_bytes.
+        A cache that cannot be written is skipped silently."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                self.dump(entry, f)
+            path = self.path(key)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+            size = path.stat().st_size
+        except OSError:
+            return
+        total = DiskCache.totals.get(self.root)
+        if total is None or total + size - replaced > self.max_bytes:
+            self.evict()
+        else:
+            DiskCache.totals[self.root] = total + size - replaced
+
+    def evict(self) -> None:
+        """Delete the least recently used entries, of any cache of the root, until they
+        fit in EVICT_TO of max_bytes, if they do not fit in max_bytes."""
+        entries = []
+        for cache in DiskCache.__subclasses__():
+            for path in (self.root / cache.subfolder).glob(f'*{cache.suffix}'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+        DiskCache.totals[self.root] = total
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f'*{self.suffix}'):
+            path.unlink(missing_ok=True)
+        DiskCache.totals.pop(self.root, None)
+
+
+class InstanceCache(DiskCache):
+    """On-disk cache of parsed instances (see Instance.from_json).
+
+    An entry is the pickled parsed content of an instance JSON file, stored
+    under a hash of the file bytes and of the data/*.py sources, so neither
+    an edited file nor a changed parser is served from a stale entry, and
+    copies of the same file share one entry. Entries are unpickled: the
+    cache is opt-in (Instance.from_json(use_cache=True)) and must live in a
+    trusted folder.
+    """
+
+    suffix = '.pickle'
+
+    @staticmethod
+    def instance_key(content: bytes) -> str:
+        """Key of an instance file content."""
+        return DiskCache.key(b'\0'.join([DiskCache.key(content).encode(), data_version().encode()]))
+
+    @staticmethod
+    def from_environment() -> InstanceCache:
+        """Cache configured by the BDSP_* environment variables, None if disabled."""
+        settings = DiskCache.settings()
+        return InstanceCache(*settings) if settings is not None else None
+
+    def load(self, f):
+        return pickle.load(f)
+
+    def dump(self, entry, f) -> None:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class ResultCache(DiskCache):
+    """On-disk cache of validation results (see FolderValidator).
+
+    An entry is the JSON report row of a solution file, with its breakdown,
+    stored under a hash of the solution file, the instance file and the
+    validator version: changing any of the three misses the cache.
+    Entries live in the results/ subfolder of the cache folder.
+    """
+
+    suffix = '.json'
+    subfolder = 'results'
+
+    def __init__(self, root: Path, max_bytes: int, version: str) -> None:
+        super().__init__(root, max_bytes)
+        self.version = version
+
+    @staticmethod
+    def from_environment(version: str) -> ResultCache:
+        """Cache configured by the BDSP_* environment variables, None if disabled."""
+        settings = DiskCache.settings()
+        return ResultCache(*settings, version) if settings is not None else None
+
+    def result_key(self, solution: bytes, instance_digest: str) -> str:
+        """Key of a (solution file content, instance file sha256) pair."""
+        return self.key(b'\0'.join([self.key(solution).encode(), instance_digest.encode(),
+                                     self.version.encode()]))
+
+    def load(self, f):
+        return json.load(f)
+
+    def dump(self, entry, f) -> None:
+        f.write(json.dumps(entry).encode())
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CompiledInstance:
+    """Array-backed, read-only view of an Instance (see Instance.compile).
+
+    Leg arrays are in sorted order, i.e. column j of a solution matrix is
+    leg j of these arrays. The distance and passive ride matrices are
+    flattened row by row: the entry (i, j) is at i * n_positions + j.
+    Distances are kept as doubles, as they are stored in the instance JSON.
+    """
+
+    n_legs: int
+    n_positions: int
+    leg_id: array
+    tour: array
+    start: array
+    end: array
+    start_pos: array
+    end_pos: array
+    drive: array
+    sorted_index: array
+    distance: array
+    passive_ride: array
+    start_work: array
+    end_work: array
+
+    @staticmethod
+    def from_instance(instance) -> CompiledInstance:
+        """Build the arrays from the legs and matrices of the instance."""
+        legs = list(instance.legs)
+        n_positions = len(instance.distance_matrix)
+        sorted_index = array('l', bytes(array('l').itemsize * len(legs)))
+        for index, leg in enumerate(legs):
+            sorted_index[leg.id] = index
+        distance = array('d')
+        passive_ride = array('d')
+        for i, row in enumerate(instance.distance_matrix):
+            distance.extend(row)
+            passive_ride.extend(0 if i == j else value for j, value in enumerate(row))
+        return CompiledInstance(
+            n_legs=len(legs),
+            n_positions=n_positions,
+            leg_id=array('l', (leg.id for leg in legs)),
+            tour=array('l', (leg.tour for leg in legs)),
+            start=array('l', (leg.start for leg in legs)),
+            end=array('l', (leg.end for leg in legs)),
+            start_pos=array('l', (leg.start_pos for leg in legs)),
+            end_pos=array('l', (leg.end_pos for leg in legs)),
+            drive=array('l', (leg.end - leg.start for leg in legs)),
+            sorted_index=sorted_index,
+            distance=distance,
+            passive_ride=passive_ride,
+            start_work=array('l', instance.start_work),
+            end_work=array('l', instance.end_work),
+        )
+
+    def get_distance(self, i: int, j: int) -> float:
+        return self.distance[i * self.n_positions + j]
+
+    def get_passive_ride(self, i: int, j: int) -> float:
+        return self.passive_ride[i * self.n_positions + j]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+# Number of leg ids kept in the samples of a Coverage.
+COVERAGE_SAMPLE = 10
+
+
+@dataclass
+class Coverage:
+    """How the legs of an instance are assigned by a solution (see check_coverage)."""
+
+    n_legs: int
+    unassigned: int
+    duplicates: int
+    unassigned_sample: List[int] = field(default_factory=list)
+    duplicate_sample: List[int] = field(default_factory=list)
+
+    @property
+    def covered(self) -> bool:
+        """True if every leg is assigned exactly once."""
+        return self.unassigned == 0 and self.duplicates == 0
+
+    def errors(self) -> List[str]:
+        """Validator messages, e.g. "Unassigned legs: 12 (3, 5, ...)"."""
+        errors = []
+        for name, count, sample in (('Unassigned', self.unassigned, self.unassigned_sample),
+                                    ('Duplicate', self.duplicates, self.duplicate_sample)):
+            if count:
+                more = ', ...' if count > len(sample) else ''
+                errors.append(f'{name} legs: {count} ({", ".join(map(str, sample))}{more})')
+        return errors
+
+
+def find_all(flags: bytearray, value: int, limit: int) -> List[int]:
+    """The first limit positions of value in flags."""
+    positions = []
+    position = flags.find(value)
+    while position != -1 and len(positions) < limit:
+        positions.append(position)
+        position = flags.find(value, position + 1)
+    return positions
+
+
+def check_coverage(assignments: Iterable[Iterable[int]], n_legs: int,
+                   sample: int = COVERAGE_SAMPLE) -> Coverage:
+    """Count the unassigned and the multiply assigned legs in one pass.
+
+    Two bytearrays indexed by leg mark the legs seen once and the legs
+    seen again; the counts and samples are then read from them with
+    bytearray.count and bytearray.find, so the cost is linear in the
+    number of assignments and the memory is 2 bytes per leg.
+
+    Parameters
+    ----------
+    assignments : Iterable[Iterable[int]]
+        for each employee, the indices (e.g. leg ids) of its legs
+    n_legs : int
+        number of legs of the instance
+    sample : int
+        number of leg indices kept in each sample
+
+    Returns
+    -------
+    Coverage
+        exact counts and the first legs of each kind
+    """
+    seen = bytearray(n_legs)
+    again = bytearray(n_legs)
+    for legs in assignments:
+        for leg in legs:
+            if seen[leg]:
+                again[leg] = 1
+            else:
+                seen[leg] = 1
+    return Coverage(n_legs=n_legs,
+                    unassigned=seen.count(0),
+                    duplicates=again.count(1),
+                    unassigned_sample=find_all(seen, 0, sample),
+                    duplicate_sample=find_all(again, 1, sample))
@@ -1,5 +1,7 @@
 from __future__ import annotations
 from typing import List
+from bisect import bisect_left
+from itertools import islice
 from sortedcontainers import SortedList
 
 # from data.busleg import BusLeg
@@ -15,6 +17,9 @@ class Employee:
     """
 
     ID = 1
+    # Evaluate with the single-sweep State.evaluate_fused (False: the
+    # rule-by-rule State.evaluate, kept as the reference implementation).
+    FUSED = True
 
     def __init__(self, id: int, instance) -> None:
         self.id = id
@@ -24,6 +29,7 @@ class Employee:
         self.instance = instance
         self.objective = 0
         self.name = 'E' + str(self.id)
+        self.pending = None
    
     def revert(self) -> None:
         self.objective = self.previous_objective
@@ -38,7 +44,10 @@ class Employee:
         self.previous_state = self.state
         self.previous_objective = self.objective
         self.state = State(self)
-        self.objective = self.state.evaluate()
+        if Employee.FUSED:
+            self.objective = self.state.evaluate_fused()
+        else:
+            self.objective = self.state.evaluate()
         return self.objective
 
     def _eq_(self, other):
@@ -73,6 +82,97 @@ class Employee:
         self.legs.add(leg)
         leg.register_employee(self)
 
+    def try_add(self, leg) -> tuple:
+        """
+        Evaluate the employee as if leg was added, without adding it.
+        This is not incremental: the whole shift with the leg is evaluated
+        again, so a probe costs O(shift length), like evaluate().
+
+        Parameters
+        ----------
+
+        leg : BusLeg
+            leg to be added to the employee
+
+        Returns
+        -------
+        tuple
+            (objective, feasible) of the employee with the leg
+        """
+        legs = list(self.legs)
+        position = bisect_left(legs, leg)
+        if position < len(legs) and legs[position] == leg:
+            raise ValueError(f'Leg {leg} is already assigned to {self.name}')
+        return self._probe(legs, legs[:position] + [leg] + legs[position:])
+
+    def try_remove(self, leg) -> tuple:
+        """
+        Evaluate the employee as if leg was removed, without removing it.
+        This is not incremental: the whole shift without the leg is evaluated
+        again, so a probe costs O(shift length), like evaluate().
+
+        Parameters
+        ----------
+
+        leg : BusLeg
+            leg of the employee to be removed
+
+        Returns
+        -------
+        tuple
+            (objective, feasible) of the employee without the leg
+        """
+        legs = list(self.legs)
+        position = bisect_left(legs, leg)
+        if position == len(legs) or legs[position] != leg:
+            raise ValueError(f'Leg {leg} is not assigned to {self.name}')
+        return self._probe(legs, legs[:position] + legs[position + 1:])
+
+    def _probe(self, legs: list, new_legs: list) -> tuple:
+        """ Evaluate the whole of new_legs with the kernel of evaluate() and keep them pending """
+        result = evaluate_shift(new_legs, self.instance) if new_legs else (0, True)
+        self.pending = (legs, new_legs, result)
+        return result[0], result[1]
+
+    def commit(self) -> int:
+        """ Apply the last try_add/try_remove to the legs, the objective and the state.
+        The state values are equal to the ones of evaluate(); revert() undoes the
+        objective and state like after evaluate().
+
+        Returns
+        -------
+        int
+            the new objective of the employee
+        """
+        if self.pending is None:
+            raise ValueError(f'No pending move on {self.name}')
+        legs, new_legs, result = self.pending
+        self.pending = None
+        if len(legs) != len(self.legs) or any(a is not b for a, b in zip(legs, self.legs)):
+            raise ValueError(f'The legs of {self.name} changed since the move was probed')
+        kept = set(map(id, new_legs))
+        for leg in legs:
+            if id(leg) not in kept:
+                self.legs.remove(leg)
+                if leg.employee is self:
+                    leg.register_employee(None)
+        added = set(map(id, legs))
+        for leg in new_legs:
+            if id(leg) not in added:
+                self.legs.add(leg)
+                leg.register_employee(self)
+        self.previous_state = self.state
+        self.previous_objective = self.objective
+        self.state = State(self)
+        if new_legs:
+            self.state.__dict__.update(zip(FIELDS[1:], result[1:]))
+        self.objective = result[0]
+        return self.objective
+
+    def rollback(self) -> None:
+        """ Discard the last try_add/try_remove """
+        self.pending = None
+
 
 class State:
     def __init__(self, employee: Employee):
@@ -314,9 +414,200 @@ class State:
         return hard_constraints + self.objective
 
 
+    def evaluate_fused(self, legs=None, instance=None):
+        """ Same result as evaluate(), computed by evaluate_shift in a single
+        forward sweep over consecutive leg pairs, without building leg_variables.
+        Every field of the state is set as evaluate() sets it.
+
+        Args:
+            legs: the legs to evaluate, sorted. Defaults to the employee legs.
+            instance: the instance of the legs. Defaults to the employee instance.
+
+        Returns:
+            hard constraint penalty + objective
+        """
+        if legs is None:
+            legs = self.employee.legs
+        if instance is None:
+            instance = self.employee.instance
+        if not legs:
+            return 0
+        result = evaluate_shift(legs, instance)
+        self.__dict__.update(zip(FIELDS[1:], result[1:]))
+        return result[0]
+
     def copy(self):
         employee_copy = self.employee.copy()
         new_state = State(employee_copy)
         new_state.__dict__.update(self.__dict__)
         return new_state
 
+
+
+# Order of the values returned by evaluate_shift:
+# the cost, then the State fields.
+FIELDS = ('cost', 'feasible', 'objective', 'actual_work_time', 'work_time',
+          'total_time', 'start_shift', 'end_shift', 'ride', 'change', 'split',
+          'split_time', 'bus_penalty', 'drive_penalty', 'rest_penalty',
+          'drive_time', 'unpaid', 'upmax', 'first15', 'break30', 'center30')
+
+
+def evaluate_shift(legs, instance) -> tuple:
+    """Evaluate the shift made of the sorted, non-empty legs.
+
+    This is the evaluation kernel of State.evaluate_fused and of the
+    Employee.try_add / try_remove probes: a single forward sweep over the consecutive
+    leg pairs, without building leg_variables. The arithmetic mirrors
+    State.evaluate operation by operation, so the values (and their
+    int/float types) are the same as the reference.
+
+    Parameters
+    ----------
+    legs : Sequence[BusLeg]
+        sorted legs of the shift (a list or a SortedList)
+    instance : Instance
+        instance of the legs
+
+    Returns
+    -------
+    tuple
+        the values listed in FIELDS
+    """
+    distance_matrix = instance.distance_matrix
+    first_leg = legs[0]
+    last_leg = legs[-1]
+    start_shift = first_leg.start - instance.start_work[first_leg.start_pos]
+    end_shift = last_leg.end + instance.end_work[last_leg.end_pos]
+    total_time = end_shift - start_shift
+
+    drive_time = first_leg.end - first_leg.start
+    ride = 0
+    bus_penalty = 0
+    change = 0
+    split = 0
+    split_time = 0
+    dc = drive_time
+    b_20 = 0
+    b_15 = 0
+    drive_penalty = 0
+    first15 = False
+    break30 = False
+    center30 = False
+    unpaid = 0
+    rest_time = 0
+    first15_limit = start_shift + 6*60
+    center_start = start_shift + 3*60
+    center_end = end_shift - 3*60
+    unpaid_start = start_shift + 2*60
+    unpaid_end = end_shift - 2*60
+
+    leg_i = first_leg
+    for leg_j in islice(legs, 1, None):
+        i = leg_i.end_pos
+        j = leg_j.start_pos
+        leg_i_end = leg_i.end
+        leg_j_start = leg_j.start
+        drive = leg_j.end - leg_j_start
+        drive_time += drive
+        passive = 0 if i == j else distance_matrix[i][j]
+        diff = leg_j_start - leg_i_end
+        diff_1 = diff - passive
+        ride += passive
+
+        same_tour = leg_i.tour == leg_j.tour
+        leg_i = leg_j
+        if not same_tour:
+            change += 1
+        if not same_tour or i != j:
+            distance = distance_matrix[i][j]
+            if diff < distance:
+                bus_penalty += abs(diff - distance)
+            elif diff <= 0:
+                bus_penalty += abs(diff)
+
+        if (diff >= 30) or (diff >= 20 and b_20 == 1) or (diff >= 15 and b_15 == 2):
+            dc = drive
+            b_20 = 0
+            b_15 = 0
+        else:
+            dc += drive
+            if diff >= 20:
+                b_20 = 1
+            if diff >= 15:
+                b_15 += 1
+        if dc >= 4*60:
+            drive_penalty += (dc - 4*60)
+
+        if diff_1 >= 180:
+            split += 1
+            split_time += diff_1
+            continue
+        if diff_1 >= 15:
+            rest_time += diff_1
+            if not first15 and leg_i_end <= first15_limit + split_time:
+                first15 = True
+            if diff_1 >= 30:
+                break30 = True
+        if min(center_end, leg_j_start - passive) - max(center_start, leg_i_end) >= 30:
+            center30 = True
+        break_end = min(unpaid_end, leg_j_start - passive)
+        break_start = max(unpaid_start, leg_i_end)
+        if break_end - break_start >= 15:
+            unpaid += break_end - break_start
+
+    if break30 is False or first15 is False:
+        upmax = 0
+        rest_time = 0
+    elif center30:
+        upmax = 90
+    else:
+        upmax = 60
+
+    work_time = total_time - split_time - min(unpaid, upmax)
+    rest_penalty = 0
+    if work_time >= 6*60:
+        if rest_time < 30:
+            rest_penalty = max(0, work_time - (6*60 - 1))
+        elif rest_time < 45:
+            rest_penalty = max(0, work_time - 9*60)
+
+    actual_work_time = max(work_time, 390)
+    objective = 2*actual_work_time + total_time \
+        + ride + 30*change + 180*split
+    hard_constraints = 1000*(bus_penalty +
+                             max(drive_time - EMPLOYEE_D_MAX, 0) +
+                             max(total_time - EMPLOYEE_T_MAX, 0) +
+                             drive_penalty + rest_penalty +
+                             max(work_time - EMPLOYEE_W_MAX, 0)
+                             )
+    return (hard_constraints + objective, not hard_constraints > 0, objective,
+            actual_work_time, work_time, total_time, start_shift, end_shift,
+            ride, change, split, split_time, bus_penalty, drive_penalty,
+            rest_penalty, drive_time, unpaid, upmax, first15, break30, center30)
+
+
+def check_parity(solution) -> List[str]:
+    """Compare evaluate_shift with the reference State.evaluate on every
+    employee of the solution.
+
+    Neither the solution nor its employees are modified.
+
+    Returns
+    -------
+    List[str]
+        one message per mismatching field, empty if the two agree
+    """
+    mismatches = []
+    for employee in solution.employees:
+        if not employee.legs:
+            continue
+        reference = State(employee)
+        cost = reference.evaluate()
+        result = evaluate_shift(employee.legs, solution.instance)
+        if result[0] != cost or type(result[0]) is not type(cost):
+            mismatches.append(f'{employee.name}: cost kernel={result[0]!r} state={cost!r}')
+        for name, field in zip(FIELDS[1:], result[1:]):
+            expected = getattr(reference, name)
+            if field != expected or type(field) is not type(expected):
+                mismatches.append(f'{employee.name}: {name} kernel={field!r} state={expected!r}')
+    return mismatches
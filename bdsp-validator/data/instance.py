@@ -7,6 +7,10 @@ import csv
 import os
 
 from data.busleg import BusLeg
+from data.cache import InstanceCache
+from data.compiled import CompiledInstance
+from data.successors import SuccessorIndex
+from data.employee import EMPLOYEE_T_MAX
 import json
 
 class Instance:
@@ -25,7 +29,8 @@ class Instance:
         # self.LB = None
         # self.BH = None
         self.name: str = None
-
+        self.compiled: CompiledInstance = None
+        self.successors: dict = {}
 
 
     @staticmethod
@@ -97,6 +102,37 @@ class Instance:
 
         return instance
 
+    def compile(self) -> CompiledInstance:
+        """Return the array-backed view of the instance, built on the first call.
+
+        Returns
+        -------
+        CompiledInstance
+            legs, distances and work times as flat arrays
+        """
+        if self.compiled is None:
+            self.compiled = CompiledInstance.from_instance(self)
+        return self.compiled
+
+    def successor_index(self, horizon: int = EMPLOYEE_T_MAX) -> SuccessorIndex:
+        """Return the legs that can follow each leg with no bus penalty,
+        built once per horizon.
+
+        Parameters
+        ----------
+        horizon : int
+            successors ending more than horizon minutes after the start of
+            the leg are pruned; None keeps all of them
+
+        Returns
+        -------
+        SuccessorIndex
+            successor graph over sorted leg indices
+        """
+        if horizon not in self.successors:
+            self.successors[horizon] = SuccessorIndex(self.compile(), horizon)
+        return self.successors[horizon]
+
     def get_index(self, leg: BusLeg) -> int:
         """get the index of the leg w.r.t. the instance
 
@@ -144,7 +180,7 @@ class Instance:
         float
             lower bound of the instance
         """
-        return sum(3*leg.drive for leg in self.legs)
+        return sum(3*drive for drive in self.compile().drive)
         
     def distance_to_dict(self) -> dict:
         """Create a dictionary distances with index the indexes of the position.
@@ -162,13 +198,21 @@ class Instance:
         return extra
 
     @staticmethod
-    def from_json(filename: str) -> Instance:
+    def from_json(filename: str, use_cache: bool = False) -> Instance:
         """Read from json file
 
+        With use_cache, the parsed content and the compiled arrays are kept
+        in the on-disk InstanceCache (keyed by the hash of the file and of
+        the data/*.py sources), so loading the same file again skips the
+        JSON parsing. The entries are pickles: only opt in when the cache
+        folder is trusted.
+
         Parameters
         ----------
         input_file : str
             path to the json file
+        use_cache : bool
+            read and fill the cache configured by the BDSP_* environment variables
 
         Returns
         -------
@@ -176,32 +220,55 @@ class Instance:
             Instance returned.
 
         """
-        legs = SortedList()
-        with open(filename, 'r') as f:
-            data = json.load(f)
-            tours = []
-            for iteration, item in enumerate(data['legs']):
-                leg = BusLeg(id=iteration, 
-                             tour=item['tour'], 
-                             start=item['start'], 
-                             end=item['end'], 
-                             start_pos=item['startPos'], 
-                             end_pos=item['endPos'])
-                if item['tour'] not in tours:
-                    tours.append(int(item['tour']))
-                legs.add(leg)
-            distance_matrix = [[] for _ in range(len(data['distances']))]
-
-            for position, row in data['distances'].items():
-                distance_matrix[int(position)] = list(row.values())
-            start_work = [position["startWork"] for position in data['extra'].values()]
-            end_work = [position["endWork"] for position in data['extra'].values()]
-            instance = Instance(legs, distance_matrix, start_work, end_work)
-            instance.start_shifts = min(leg.start for leg in instance.legs)
-            instance.end_shifts = max(leg.end for leg in instance.legs)
-            instance.tours = sorted(tours)
-            instance.name = filename.split('/')[-1].split('.')[0]
-            return instance
+        with open(filename, 'rb') as f:
+            content = f.read()
+        cache = InstanceCache.from_environment() if use_cache else None
+        entry = None
+        if cache is not None:
+            key = InstanceCache.instance_key(content)
+            entry = cache.get(key)
+        if entry is None:
+            entry = Instance.parse_json(content)
+            instance = Instance.from_entry(entry)
+            if cache is not None:
+                entry['compiled'] = instance.compile()
+                cache.put(key, entry)
+        else:
+            instance = Instance.from_entry(entry)
+        instance.name = filename.split('/')[-1].split('.')[0]
+        return instance
+
+    @staticmethod
+    def parse_json(content: bytes) -> dict:
+        """Parse the content of an instance JSON file into the plain lists
+        cached by from_json (legs as (tour, start, end, startPos, endPos) by id)."""
+        data = json.loads(content)
+        legs = [(item['tour'], item['start'], item['end'], item['startPos'], item['endPos'])
+                for item in data['legs']]
+        tours = []
+        for item in data['legs']:
+            if item['tour'] not in tours:
+                tours.append(int(item['tour']))
+        distance_matrix = [[] for _ in range(len(data['distances']))]
+        for position, row in data['distances'].items():
+            distance_matrix[int(position)] = list(row.values())
+        start_work = [position["startWork"] for position in data['extra'].values()]
+        end_work = [position["endWork"] for position in data['extra'].values()]
+        return {'legs': legs, 'tours': tours, 'distance_matrix': distance_matrix,
+                'start_work': start_work, 'end_work': end_work}
+
+    @staticmethod
+    def from_entry(entry: dict) -> Instance:
+        """Build the instance from the output of parse_json (and its compiled arrays, if any)."""
+        legs = SortedList(BusLeg(id=iteration, tour=tour, start=start, end=end,
+                                 start_pos=start_pos, end_pos=end_pos)
+                          for iteration, (tour, start, end, start_pos, end_pos) in enumerate(entry['legs']))
+        instance = Instance(legs, entry['distance_matrix'], entry['start_work'], entry['end_work'])
+        instance.start_shifts = min(leg.start for leg in instance.legs)
+        instance.end_shifts = max(leg.end for leg in instance.legs)
+        instance.tours = sorted(entry['tours'])
+        instance.compiled = entry.get('compiled')
+        return instance
 
     def to_json(self, output_file: str = None) -> None:
 
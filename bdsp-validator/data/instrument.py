@@ -0,0 +1,158 @@
+from __future__ import annotations
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+import time
+
+from data.employee import Employee, State, EMPLOYEE_D_MAX, EMPLOYEE_T_MAX, EMPLOYEE_W_MAX
+
+# Hard-constraint rules whose firing is counted: name -> test on an evaluated State.
+PENALTIES = {
+    'bus': lambda state: state.bus_penalty > 0,
+    'drive': lambda state: state.drive_penalty > 0,
+    'rest': lambda state: state.rest_penalty > 0,
+    'd_max': lambda state: state.drive_time > EMPLOYEE_D_MAX,
+    't_max': lambda state: state.total_time > EMPLOYEE_T_MAX,
+    'w_max': lambda state: state.work_time > EMPLOYEE_W_MAX,
+}
+# Methods that evaluate a whole shift; KernelHook.evaluated is called after them.
+SHIFT_METHODS = ('evaluate', 'evaluate_fused')
+
+# Original State methods while the kernel is instrumented, None otherwise.
+_originals = None
+
+
+class KernelHook:
+    """Receiver of the events of the instrumented evaluation kernel.
+
+    enter and leave are called around every State.evaluate* method (nested
+    calls included, e.g. evaluate_first15 inside evaluate_working_regulations),
+    evaluated after the evaluation of a whole shift. The default methods do
+    nothing; a hook overrides the ones it needs, e.g. a sampling profiler
+    only looking at one shift in 100:
+
+        class Sampler(KernelHook):
+            def __init__(self):
+                self.shifts = 0
+            def evaluated(self, state, n_legs):
+                self.shifts += 1
+                if self.shifts % 100 == 0:
+                    print(n_legs, state.objective)
+    """
+
+    def enter(self, state: State, method: str) -> None:
+        pass
+
+    def leave(self, state: State, method: str, seconds: float) -> None:
+        pass
+
+    def evaluated(self, state: State, n_legs: int) -> None:
+        pass
+
+
+class KernelCounters(KernelHook):
+    """Calls and (inclusive) seconds per State method, shifts in which each
+    hard-constraint rule of PENALTIES fires, and histogram of the shift
+    lengths in legs."""
+
+    def __init__(self) -> None:
+        self.calls = Counter()
+        self.seconds = Counter()
+        self.penalties = Counter()
+        self.shift_lengths = Counter()
+        self.shifts = 0
+
+    def leave(self, state: State, method: str, seconds: float) -> None:
+        self.calls[method] += 1
+        self.seconds[method] += seconds
+
+    def evaluated(self, state: State, n_legs: int) -> None:
+        self.shifts += 1
+        self.shift_lengths[n_legs] += 1
+        for name, fires in PENALTIES.items():
+            if fires(state):
+                self.penalties[name] += 1
+
+    def as_dict(self) -> dict:
+        """JSON-serializable counters, the methods by decreasing time."""
+        return {
+            'shifts': self.shifts,
+            'methods': {method: {'calls': self.calls[method], 'seconds': round(seconds, 6)}
+                        for method, seconds in self.seconds.most_common()},
+            'penalties': {name: self.penalties[name] for name in PENALTIES},
+            'shift_lengths': {n_legs: self.shift_lengths[n_legs] for n_legs in sorted(self.shift_lengths)},
+        }
+
+
+def _wrap(name: str, method, hooks: tuple):
+    """method calling the hooks around it."""
+    @wraps(method)
+    def instrumented_method(self, *args, **kwargs):
+        for hook in hooks:
+            hook.enter(self, name)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            for hook in hooks:
+                hook.leave(self, name, seconds)
+            if name in SHIFT_METHODS:
+                legs = args[0] if args and args[0] is not None else kwargs.get('legs') or self.employee.legs
+                for hook in hooks:
+                    hook.evaluated(self, len(legs))
+    return instrumented_method
+
+
+def enable(*hooks: KernelHook, rules: bool = False) -> None:
+    """Instrument the State.evaluate* methods with the hooks.
+
+    By default Employee.evaluate keeps its evaluation, the single-sweep
+    State.evaluate_fused in production (Employee.FUSED), seen by the hooks
+    as a whole: the counters then measure the default path. With
+    rules=True, Employee.evaluate is switched to the rule-by-rule reference
+    State.evaluate, so that every rule is seen by the hooks; the times are
+    then those of the reference, not of the default path. The evaluations
+    that do not go through a State (Employee.try_add and try_remove call
+    evaluate_shift directly) are never seen. Nothing is
+    instrumented before enable and after disable: the kernel then runs its
+    original methods, at no cost.
+    """
+    global _originals
+    if _originals is not None:
+        raise RuntimeError('The evaluation kernel is already instrumented')
+    _originals = {name: method for name, method in vars(State).items()
+                  if name.startswith('evaluate') and callable(method)}
+    _originals['FUSED'] = Employee.FUSED
+    for name, method in _originals.items():
+        if name != 'FUSED':
+            setattr(State, name, _wrap(name, method, hooks))
+    if rules:
+        Employee.FUSED = False
+
+
+def disable() -> None:
+    """Restore the original State methods and Employee.FUSED."""
+    global _originals
+    if _originals is None:
+        return
+    Employee.FUSED = _originals.pop('FUSED')
+    for name, method in _originals.items():
+        setattr(State, name, method)
+    _originals = None
+
+
+@contextmanager
+def instrumented(*hooks: KernelHook, rules: bool = False):
+    """enable(*hooks, rules=rules) for the duration of the with block, e.g.
+
+        counters = KernelCounters()
+        with instrumented(counters):
+            solution.evaluate()
+        print(counters.as_dict())
+    """
+    enable(*hooks, rules=rules)
+    try:
+        yield hooks
+    finally:
+        disable()
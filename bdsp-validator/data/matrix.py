@@ -0,0 +1,174 @@
+from __future__ import annotations
+from typing import List
+
+# First line of a sparse solution file, followed by " legs=<number of legs>".
+SPARSE_HEADER = b'# bdsp-sparse'
+
+
+class MatrixFormatError(ValueError):
+    """Raised when a solution matrix row is malformed. Carries the 1-based line number."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f'Line {line}: {message}')
+        self.line = line
+        self.message = message
+
+    def __reduce__(self):
+        # Rebuilt from (line, message), e.g. when raised in a worker process.
+        return MatrixFormatError, (self.line, self.message)
+
+
+def parse_row(line: bytes, line_number: int, n_legs: int) -> List[int]:
+    """Return the column indices of the ones of a dense 0/1 row.
+
+    Rows written as plain "0,1,0,..." are checked and scanned on the raw bytes,
+    without creating one object per cell. Other spellings ("1.0", spaces
+    around the values) go through a per-cell check.
+
+    Parameters
+    ----------
+    line : bytes
+        the row, without line terminator
+    line_number : int
+        1-based line number, for the error messages
+    n_legs : int
+        expected number of columns
+
+    Returns
+    -------
+    List[int]
+        the indices of the columns equal to 1
+    """
+    if len(line) == 2*n_legs - 1 and line.count(b',') == n_legs - 1 \
+            and not line[0::2].translate(None, b'01'):
+        ones = []
+        position = line.find(b'1')
+        while position != -1:
+            ones.append(position >> 1)
+            position = line.find(b'1', position + 2)
+        return ones
+
+    cells = line.split(b',')
+    if len(cells) != n_legs:
+        raise MatrixFormatError(line_number, f'{len(cells)} columns but the instance has {n_legs} legs')
+    ones = []
+    for column, cell in enumerate(cells):
+        cell = cell.strip()
+        if cell == b'0':
+            continue
+        if cell == b'1':
+            ones.append(column)
+            continue
+        try:
+            value = float(cell)
+        except ValueError:
+            value = None
+        if value == 1:
+            ones.append(column)
+        elif value != 0:
+            raise MatrixFormatError(line_number, f'column {column + 1} is {cell.decode(errors="replace")!r}, '
+                                                 f'expected 0 or 1')
+    return ones
+
+
+def parse_matrix(data: bytes, n_legs: int) -> List[List[int]]:
+    """Parse a dense n_employees x n_legs 0/1 matrix.
+
+    Blank lines are skipped. Every other line must have n_legs columns of 0 or 1.
+
+    Parameters
+    ----------
+    data : bytes
+        content of the solution file
+    n_legs : int
+        number of legs of the instance
+
+    Returns
+    -------
+    List[List[int]]
+        for each row, the indices of the legs assigned to it
+
+    Raises
+    ------
+    MatrixFormatError
+        if a row has the wrong width or a value other than 0 or 1
+    """
+    rows = []
+    for line_number, line in enumerate(data.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        rows.append(parse_row(line, line_number, n_legs))
+    return rows
+
+
+def is_sparse(data: bytes) -> bool:
+    """True if the content is a sparse solution (starts with SPARSE_HEADER)."""
+    return data.lstrip().startswith(SPARSE_HEADER)
+
+
+def parse_sparse(data: bytes, n_legs: int) -> List[List[int]]:
+    """Parse a sparse solution: a SPARSE_HEADER line, then one line per shift
+    with the space separated indices of its legs. An empty line is an empty shift.
+
+    Parameters
+    ----------
+    data : bytes
+        content of the solution file
+    n_legs : int
+        number of legs of the instance
+
+    Returns
+    -------
+    List[List[int]]
+        for each shift, the sorted indices of its legs
+
+    Raises
+    ------
+    MatrixFormatError
+        if the header does not match the instance, or an index is not a leg
+        index or is repeated in the shift
+    """
+    lines = data.lstrip().splitlines()
+    header = lines[0].split()
+    if len(header) > 2 and header[2] != b'legs=%d' % n_legs:
+        raise MatrixFormatError(1, f'header {header[2].decode(errors="replace")!r} '
+                                   f'but the instance has {n_legs} legs')
+    rows = []
+    for line_number, line in enumerate(lines[1:], start=2):
+        try:
+            row = sorted(map(int, line.split()))
+        except ValueError:
+            raise MatrixFormatError(line_number, 'leg indices must be integers') from None
+        if row and (row[0] < 0 or row[-1] >= n_legs):
+            raise MatrixFormatError(line_number, f'leg index out of range 0..{n_legs - 1}')
+        if len(set(row)) != len(row):
+            raise MatrixFormatError(line_number, 'repeated leg index')
+        rows.append(row)
+    return rows
+
+
+def parse_solution(data: bytes, n_legs: int) -> List[List[int]]:
+    """Parse a dense or a sparse solution, detected from the content."""
+    if is_sparse(data):
+        return parse_sparse(data, n_legs)
+    return parse_matrix(data, n_legs)
+
+
+def format_matrix(rows: List[List[int]], n_legs: int) -> bytes:
+    """Dense 0/1 matrix of the rows, as written by csv.writer."""
+    zeros = b'0,' * (n_legs - 1) + b'0\r\n'
+    lines = []
+    for row in rows:
+        line = bytearray(zeros)
+        for leg in row:
+            line[2*leg] = 0x31
+        lines.append(line)
+    return b''.join(lines)
+
+
+def format_sparse(rows: List[List[int]], n_legs: int) -> bytes:
+    """Sparse form of the rows, one line per shift (empty shifts included)."""
+    lines = [SPARSE_HEADER + b' legs=%d' % n_legs]
+    lines.extend(b' '.join(b'%d' % leg for leg in row) for row in rows)
+    return b'\n'.join(lines) + b'\n'
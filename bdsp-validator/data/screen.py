@@ -0,0 +1,33 @@
+from __future__ import annotations
+from typing import List
+
+from data.employee import EMPLOYEE_D_MAX, EMPLOYEE_T_MAX
+
+# Checks of screen_shift, then 'full' for the shifts only evaluate_shift can judge.
+TIERS = ('span', 'drive', 'full')
+
+
+def screen_shift(legs, instance) -> List[tuple]:
+    """Sure hard-constraint violations of the shift made of the sorted,
+    non-empty legs, from cheap bounds, without evaluating the shift:
+
+    - 'span': the shift time (first leg minus start_work to last leg plus
+      end_work) exceeds EMPLOYEE_T_MAX;
+    - 'drive': the summed drive time exceeds EMPLOYEE_D_MAX.
+
+    This is the screen stage of Validator.validate_fast, run on every
+    shift before any is evaluated.
+
+    Returns
+    -------
+    List[tuple]
+        (check, value, limit) of each violated bound, empty if only
+        evaluate_shift can tell
+    """
+    first = legs[0]
+    last = legs[-1]
+    span = (last.end + instance.end_work[last.end_pos]) - (first.start - instance.start_work[first.start_pos])
+    drive = sum(leg.end - leg.start for leg in legs)
+    return [(check, value, limit)
+            for check, value, limit in (('span', span, EMPLOYEE_T_MAX), ('drive', drive, EMPLOYEE_D_MAX))
+            if value > limit]
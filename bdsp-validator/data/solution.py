@@ -1,12 +1,15 @@
 from __future__ import annotations
 from typing import List
 from pathlib import Path
+from bisect import insort
 
 import csv
 import os 
 
-from data.employee import Employee
+from data.employee import Employee, State
+from data.coverage import Coverage, check_coverage
 from data.instance import Instance
+from data.matrix import parse_solution, format_matrix, format_sparse
 
 
 class Solution:
@@ -76,7 +79,144 @@ class Solution:
             if employee.state.feasible is False:
                 self.feasible = False
 
-    def print_to_file(self, file: str) -> None:
+    def coverage(self) -> Coverage:
+        """Count the legs of the instance assigned to no employee or to several.
+
+        Returns
+        -------
+        Coverage
+            exact counts and samples of leg ids
+        """
+        n_legs = len(self.instance.legs) if self.instance is not None else 0
+        return check_coverage(((leg.id for leg in employee.legs) for employee in self.employees), n_legs)
+
+    def evaluate_change(self, new_legs: dict) -> tuple:
+        """Evaluate the solution as if some employees had other legs, without
+        modifying the employees, their states or the legs.
+        The solution must have been evaluated.
+
+        Parameters
+        ----------
+        new_legs : dict
+            employee -> sorted list of the legs it would have
+
+        Returns
+        -------
+        tuple
+            (objective delta, True if all the changed employees are feasible)
+        """
+        delta = 0
+        feasible = True
+        for employee, legs in new_legs.items():
+            state = State(employee)
+            delta += state.evaluate_fused(legs, self.instance) - employee.objective
+            if state.feasible is False:
+                feasible = False
+        return delta, feasible
+
+    @staticmethod
+    def _check_move(a: Employee, b: Employee, owned: list) -> None:
+        """Raise ValueError unless a and b are two employees and each (leg, employee) of owned is assigned."""
+        if a is b:
+            raise ValueError(f'A move needs two different employees, got {a.name} twice')
+        for leg, employee in owned:
+            if leg not in employee.legs:
+                raise ValueError(f'Leg {leg} is not assigned to {employee.name}')
+
+    def evaluate_relocate(self, leg, source: Employee, target: Employee) -> tuple:
+        """Objective delta and feasibility if leg moved from source to target.
+
+        Raises
+        ------
+        ValueError
+            if source is target or leg is not assigned to source
+        """
+        self._check_move(source, target, [(leg, source)])
+        source_legs = [l for l in source.legs if l != leg]
+        target_legs = list(target.legs)
+        insort(target_legs, leg)
+        return self.evaluate_change({source: source_legs, target: target_legs})
+
+    def evaluate_swap(self, a: Employee, leg_a, b: Employee, leg_b) -> tuple:
+        """Objective delta and feasibility if leg_a (of a) and leg_b (of b) were swapped.
+
+        Raises
+        ------
+        ValueError
+            if a is b, or leg_a is not assigned to a or leg_b to b
+        """
+        self._check_move(a, b, [(leg_a, a), (leg_b, b)])
+        a_legs = [l for l in a.legs if l != leg_a]
+        b_legs = [l for l in b.legs if l != leg_b]
+        insort(a_legs, leg_b)
+        insort(b_legs, leg_a)
+        return self.evaluate_change({a: a_legs, b: b_legs})
+
+    def evaluate_tail_exchange(self, a: Employee, b: Employee, cut: int) -> tuple:
+        """Objective delta and feasibility if a and b exchanged all their legs
+        starting at or after the time cut (2-opt move).
+
+        Raises
+        ------
+        ValueError
+            if a is b
+        """
+        self._check_move(a, b, [])
+        a_head = [l for l in a.legs if l.start < cut]
+        b_head = [l for l in b.legs if l.start < cut]
+        a_tail = list(a.legs)[len(a_head):]
+        b_tail = list(b.legs)[len(b_head):]
+        return self.evaluate_change({a: a_head + b_tail, b: b_head + a_tail})
+
+    def evaluate_chain(self, relocations: list) -> tuple:
+        """Objective delta and feasibility if the relocations were applied in order.
+
+        Parameters
+        ----------
+        relocations : list
+            (leg, source, target) tuples, e.g. an ejection chain
+
+        Raises
+        ------
+        ValueError
+            if a relocation has source is target, or moves a leg that
+            source does not have at that point of the chain
+        """
+        new_legs = {}
+        for leg, source, target in relocations:
+            if source not in new_legs:
+                new_legs[source] = list(source.legs)
+            if target not in new_legs:
+                new_legs[target] = list(target.legs)
+            if source is target:
+                raise ValueError(f'A move needs two different employees, got {source.name} twice')
+            if leg not in new_legs[source]:
+                raise ValueError(f'Leg {leg} is not assigned to {source.name}')
+            new_legs[source].remove(leg)
+            insort(new_legs[target], leg)
+        return self.evaluate_change(new_legs)
+
+    def evaluate_moves(self, moves: list) -> list:
+        """Evaluate a list of candidate moves, none of them is applied.
+
+        Parameters
+        ----------
+        moves : list
+            tuples ('relocate', leg, source, target), ('swap', a, leg_a, b, leg_b),
+            ('tail', a, b, cut) or ('chain', relocations)
+
+        Returns
+        -------
+        list
+            (objective delta, feasible) for each move
+        """
+        evaluators = {'relocate': self.evaluate_relocate,
+                      'swap': self.evaluate_swap,
+                      'tail': self.evaluate_tail_exchange,
+                      'chain': self.evaluate_chain}
+        return [evaluators[move[0]](*move[1:]) for move in moves]
+
+    def print_to_file(self, file: str, sparse: bool = False) -> None:
         """  Print the solution into the given file.  
              
              The output format is a binary matrix n x l where:
@@ -84,26 +224,28 @@ class Solution:
                 l is the number of bus legs (ordered by start time)
                 the element (i,j) is 1 if leg j is assigned to employee i, 0 otherwise.
 
+             With sparse=True, the file has a "# bdsp-sparse legs=l" header and
+             then one line per employee with the (space separated) j of its legs.
+
         Parameters
         ----------
         file : str
             Desired output file
+        sparse : bool
+            Write the sparse format instead of the matrix
             
         """
-        data = [[0 for _ in self.instance.legs] for _ in self.employees] 
-        # if not os.path.exists(os.path.dirname(file)):
-        #     os.makedirs(os.path.dirname(file))
-        with open(file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            for employee in self.employees:
-                for leg in employee.legs:
-                    data[employee.id][self.instance.get_index(leg)] = 1
-                writer.writerow(data[employee.id])
+        sorted_index = self.instance.compile().sorted_index
+        rows = [sorted(sorted_index[leg.id] for leg in employee.legs) for employee in self.employees]
+        write = format_sparse if sparse else format_matrix
+        with open(file, 'wb') as f:
+            f.write(write(rows, len(self.instance.legs)))
 
 
     @staticmethod
     def from_file(instance: Instance, file: Path) -> Solution:
-        """Read a solution from file
+        """Read a solution from file, either a binary matrix or the sparse
+        format of print_to_file (detected from the content)
 
         Parameters
         ----------
@@ -116,21 +258,48 @@ class Solution:
         -------
         Solution
             Solution readed.
+
+        Raises
+        ------
+        MatrixFormatError
+            if a row has the wrong number of columns or a value other than 0 or 1,
+            or a sparse line has an invalid leg index
+        """
+        return Solution.from_bytes(instance, Path(file).read_bytes())
+
+    @staticmethod
+    def from_bytes(instance: Instance, data: bytes) -> Solution:
+        """Read a solution from the content of a solution file (see from_file)
+
+        Parameters
+        ----------
+        instance : Instance
+            Instance used to read the solution
+        data : bytes
+            content of the file, a binary matrix or the sparse format
+
+        Returns
+        -------
+        Solution
+            Solution readed.
+
+        Raises
+        ------
+        MatrixFormatError
+            if the content is malformed (see from_file)
         """
         employees: List[Employee] = []
         counter = 0
-        with file.open('r') as f:
-            f = csv.reader(f, quoting=csv.QUOTE_NONNUMERIC)
-            for row in f:
-                row_legs = [index for index, value in enumerate(row) if value == 1]
-                if not row_legs:
-                    continue
-                employee = Employee(counter, instance)
-                employee.name = f'E{str(counter)}'
-                counter += 1
-                employees.append(employee)
-                for leg in row_legs:
-                    employee.add_leg(instance.legs[leg])
+        legs = list(instance.legs)
+        for row_legs in parse_solution(data, len(legs)):
+            if not row_legs:
+                continue
+            employee = Employee(counter, instance)
+            employee.name = f'E{str(counter)}'
+            counter += 1
+            employees.append(employee)
+            for leg in row_legs:
+                employee.add_leg(legs[leg])
         # employees = sorted(employees, key=lambda x: x.legs[0].start)
         for i, employee in enumerate(employees):
             employee.id = i
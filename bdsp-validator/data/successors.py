@@ -0,0 +1,77 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from typing import List
+
+from data.employee import EMPLOYEE_T_MAX
+
+
+class SuccessorIndex:
+    """Sparse successor graph of the legs of an instance (see Instance.successor_index).
+
+    Leg j is a successor of leg i when j comes after i in the sorted order and
+    the pair (i, j) has no bus penalty in State.evaluate_bus_penalty: same tour
+    and position, or a gap of at least the distance between the positions.
+    With a horizon, successors ending more than horizon minutes after the start
+    of i are pruned (such a shift exceeds EMPLOYEE_T_MAX anyway).
+
+    The graph is stored in CSR form over sorted leg indices: the successors of
+    i are targets[offsets[i]:offsets[i+1]], in increasing order, with the gap,
+    the passive ride and the tour change of each pair in the same positions.
+    """
+
+    def __init__(self, compiled, horizon: int = EMPLOYEE_T_MAX) -> None:
+        self.horizon = horizon
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        self.gap = array('l')
+        self.ride = array('d')
+        self.change = bytearray()
+
+        start, end = compiled.start, compiled.end
+        start_pos, end_pos, tour = compiled.start_pos, compiled.end_pos, compiled.tour
+        n_positions = compiled.n_positions
+        n_legs = compiled.n_legs
+        for i in range(n_legs):
+            leg_start, leg_end, position, leg_tour = start[i], end[i], end_pos[i], tour[i]
+            row = position * n_positions
+            distance = compiled.distance[row:row + n_positions]
+            last = n_legs
+            if horizon is not None:
+                last = bisect_left(start, leg_start + horizon + 1, i + 1)
+            targets = [j for j in range(i + 1, last)
+                       if (horizon is None or end[j] - leg_start <= horizon)
+                       and ((tour[j] == leg_tour and start_pos[j] == position)
+                            or (start[j] - leg_end >= distance[start_pos[j]] and start[j] >= leg_end))]
+            passive_ride = compiled.passive_ride[row:row + n_positions]
+            self.targets.extend(targets)
+            self.gap.extend([start[j] - leg_end for j in targets])
+            self.ride.extend([passive_ride[start_pos[j]] for j in targets])
+            self.change.extend([tour[j] != leg_tour for j in targets])
+            self.offsets.append(len(self.targets))
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def successors(self, i: int) -> List[int]:
+        """Sorted indices of the legs that can follow leg i."""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def find(self, i: int, j: int) -> int:
+        """Position of the pair (i, j) in the arrays, -1 if j cannot follow i."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        position = bisect_left(self.targets, j, lo, hi)
+        if position < hi and self.targets[position] == j:
+            return position
+        return -1
+
+    def can_follow(self, i: int, j: int) -> bool:
+        """True if leg j can follow leg i with no bus penalty (within the horizon)."""
+        return self.find(i, j) >= 0
+
+    def edge(self, i: int, j: int) -> tuple:
+        """(gap, passive ride, tour change) of the pair, None if j cannot follow i."""
+        position = self.find(i, j)
+        if position < 0:
+            return None
+        return self.gap[position], self.ride[position], bool(self.change[position])
@@ -0,0 +1,213 @@
+"""
+BDSP stress-instance generator
+
+Generates synthetic instances larger than the bundled ones (1,000 to
+10,000 legs, hundreds of stations), with a feasible and a deliberately
+infeasible solution, all determined by the seed. The instances look like
+the realistic ones: stations on a plane with travel times between them, a
+few depots with start/end work times, and bus tours of 4 to 14 legs of
+10 to 60 minutes around a morning and an afternoon peak.
+
+The feasible solution cuts every tour into shifts of consecutive legs
+short enough (under 4 hours of driving, 5.5 hours in total) to break no
+rule. The infeasible one applies the violations of --violations to it:
+overlap (two overlapping shifts merged: bus penalty), long (the earliest
+and the latest shift merged: T_MAX), uncovered (a leg dropped) and
+duplicate (a leg assigned twice).
+
+Usage:
+    # stress/stress_5000_1.json, stress_5000_1_feasible.csv, stress_5000_1_infeasible.csv:
+    python generate.py --legs 5000 --stations 300 --seed 1 -o stress/
+
+    # Sparse solutions (see convert.py):
+    python generate.py --legs 10000 --seed 2 -o stress/ --sparse
+"""
+
+import argparse
+import math
+import random
+from pathlib import Path
+from typing import List
+
+from sortedcontainers import SortedList
+
+from data.busleg import BusLeg
+from data.instance import Instance
+from data.matrix import format_matrix, format_sparse
+from data.solution import Solution
+
+# Travel time between two legs at the same station, as in the bundled instances.
+SAME_STATION = 10
+# Stations per depot (depots have the start and end work times).
+STATIONS_PER_DEPOT = 40
+DEPOT_START_WORK = 15
+DEPOT_END_WORK = 10
+# Bounds of the shifts of the feasible solution: a shift under 6 hours of
+# work needs no rest break, under 4 hours of driving no driving break.
+FEASIBLE_SPAN = 330
+FEASIBLE_DRIVE = 230
+VIOLATIONS = ('overlap', 'long', 'uncovered', 'duplicate')
+
+
+def generate_instance(n_legs: int, n_stations: int = 200, seed: int = 0) -> Instance:
+    """Generate an instance of n_legs legs between n_stations stations.
+
+    Parameters
+    ----------
+    n_legs : int
+        number of legs
+    n_stations : int
+        number of stations (positions)
+    seed : int
+        seed of the generator, the same seed gives the same instance
+
+    Returns
+    -------
+    Instance
+        the instance, named stress_<n_legs>_<seed>
+    """
+    rng = random.Random(seed)
+    side = 30 * math.sqrt(n_stations / 10)
+    points = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(n_stations)]
+    distance_matrix = [[SAME_STATION if i == j else max(5, round(math.dist(p, q))) for j, q in enumerate(points)]
+                       for i, p in enumerate(points)]
+    depots = range(0, n_stations, STATIONS_PER_DEPOT)
+    start_work = [DEPOT_START_WORK if i in depots else 0 for i in range(n_stations)]
+    end_work = [DEPOT_END_WORK if i in depots else 0 for i in range(n_stations)]
+    neighbours = [sorted(range(n_stations), key=lambda j: distance_matrix[i][j])[1:9] for i in range(n_stations)]
+
+    legs = []
+    tour = 0
+    while len(legs) < n_legs:
+        tour += 1
+        peak = rng.random()
+        if peak < 0.45:
+            time = rng.gauss(420, 60)
+        elif peak < 0.8:
+            time = rng.gauss(960, 90)
+        else:
+            time = rng.uniform(240, 1320)
+        time = int(min(max(time, 180), 1380))
+        position = rng.choice(depots) if rng.random() < 0.5 else rng.randrange(n_stations)
+        for _ in range(rng.randint(4, 14)):
+            if len(legs) == n_legs or time > 1560:
+                break
+            end_pos = rng.choice(neighbours[position])
+            drive = min(60, max(10, distance_matrix[position][end_pos] + rng.randint(0, 10)))
+            legs.append((tour, time, time + drive, position, end_pos))
+            time += drive + rng.randint(3, 35)
+            position = end_pos
+
+    legs.sort(key=lambda leg: (leg[1], leg[0]))
+    instance = Instance(SortedList(BusLeg(id=index, tour=tour, start=start, end=end, start_pos=start_pos,
+                                          end_pos=end_pos)
+                                   for index, (tour, start, end, start_pos, end_pos) in enumerate(legs)),
+                        distance_matrix, start_work, end_work)
+    instance.start_shifts = min(leg.start for leg in instance.legs)
+    instance.end_shifts = max(leg.end for leg in instance.legs)
+    instance.tours = sorted({leg.tour for leg in instance.legs})
+    instance.name = f'stress_{n_legs}_{seed}'
+    return instance
+
+
+def feasible_solution(instance: Instance, seed: int = 0) -> List[List[int]]:
+    """Rows of a feasible solution: the legs (matrix columns) of each shift.
+
+    Every tour is cut into shifts of consecutive legs, of at most 3 to 8
+    legs, FEASIBLE_SPAN minutes and FEASIBLE_DRIVE minutes of driving. A
+    shift found infeasible anyway is split into one shift per leg.
+    """
+    rng = random.Random(seed)
+    tours = {}
+    for leg in instance.legs:
+        tours.setdefault(leg.tour, []).append(leg)
+    shifts = []
+    for legs in tours.values():
+        shift, drive, limit = [], 0, rng.randint(3, 8)
+        for leg in legs:
+            if shift:
+                span = leg.end + instance.end_work[leg.end_pos] \
+                    - shift[0].start + instance.start_work[shift[0].start_pos]
+                if len(shift) == limit or span > FEASIBLE_SPAN or drive + leg.drive > FEASIBLE_DRIVE:
+                    shifts.append(shift)
+                    shift, drive, limit = [], 0, rng.randint(3, 8)
+            shift.append(leg)
+            drive += leg.drive
+        shifts.append(shift)
+
+    sorted_index = instance.compile().sorted_index
+    rows = [sorted(sorted_index[leg.id] for leg in shift) for shift in shifts]
+    solution = Solution.from_bytes(instance, format_sparse(rows, len(instance.legs)))
+    solution.evaluate()
+    feasible_rows = []
+    for row, employee in zip(rows, solution.employees):
+        if employee.state.feasible:
+            feasible_rows.append(row)
+        else:
+            feasible_rows.extend([leg] for leg in row)
+    return sorted(feasible_rows)
+
+
+def infeasible_solution(instance: Instance, seed: int = 0, violations=VIOLATIONS) -> List[List[int]]:
+    """Rows of the feasible solution of the seed, with each violation of
+    violations applied once (see the module docstring)."""
+    rng = random.Random(seed)
+    rows = [list(row) for row in feasible_solution(instance, seed)]
+    starts = instance.compile().start
+    ends = instance.compile().end
+    for violation in violations:
+        if violation == 'overlap':
+            a = rng.randrange(len(rows))
+            overlapping = [b for b, row in enumerate(rows) if b != a and starts[row[0]] < ends[rows[a][-1]]
+                           and starts[rows[a][0]] < ends[row[-1]]]
+            if overlapping:
+                b = rng.choice(overlapping)
+                rows[a] = sorted(rows[a] + rows[b])
+                del rows[b]
+        elif violation == 'long':
+            first = min(range(len(rows)), key=lambda r: starts[rows[r][0]])
+            last = max(range(len(rows)), key=lambda r: ends[rows[r][-1]])
+            if first != last:
+                rows[first] = sorted(rows[first] + rows[last])
+                del rows[last]
+        elif violation == 'uncovered':
+            row = rng.choice([row for row in rows if len(row) > 1])
+            row.remove(rng.choice(row))
+        elif violation == 'duplicate':
+            a, b = rng.sample(range(len(rows)), 2)
+            rows[a] = sorted(set(rows[a]) | {rng.choice(rows[b])})
+        else:
+            raise ValueError(f'Unknown violation {violation}, expected one of {VIOLATIONS}')
+    return rows
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description='BDSP stress-instance generator')
+    parser.add_argument('--legs', required=True, type=int, help='Number of legs')
+    parser.add_argument('--stations', type=int, default=200, help='Number of stations')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the instance and its solutions')
+    parser.add_argument('--output', '-o', type=str, default='.', help='Output folder')
+    parser.add_argument('--sparse', action='store_true', help='Write the solutions in the sparse format')
+    parser.add_argument('--violations', type=str, default=','.join(VIOLATIONS),
+                        help=f'Comma-separated violations of the infeasible solution, among {VIOLATIONS}')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_arguments()
+    instance = generate_instance(args.legs, args.stations, args.seed)
+    folder = Path(args.output)
+    instance.to_json(str(folder / f'{instance.name}.json'))
+    write = format_sparse if args.sparse else format_matrix
+    suffix = '.sparse' if args.sparse else '.csv'
+    violations = [violation for violation in args.violations.split(',') if violation]
+    for kind, rows in (('feasible', feasible_solution(instance, args.seed)),
+                       ('infeasible', infeasible_solution(instance, args.seed, violations))):
+        (folder / f'{instance.name}_{kind}{suffix}').write_bytes(write(rows, len(instance.legs)))
+    print(f'{folder / instance.name}: {len(instance.legs)} legs, {len(instance.tours)} tours, '
+          f'{len(instance.distance_matrix)} stations')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+"""
+BDSP validation server
+
+Long-lived local HTTP server (asyncio, standard library only) that validates
+solutions without paying the interpreter start-up, the validator import and
+the instance loading on every call. Parsed instances are kept in an LRU
+cache in each worker; solutions are validated in a pool of worker processes.
+
+Endpoints:
+    POST /validate?instance=<name>[&author=<login>][&file=<name>]
+        Body: the solution, dense 0/1 matrix or sparse format (see convert.py).
+        Returns the result dict of the submission gate (submission.py, as
+        scripts/apply_submission.py but never applied): status, valid, objective,
+        previous_bks, gap_pct, errors, message, ...
+    GET /health
+        Liveness, uptime and configuration.
+    GET /metrics
+        Request counts and latencies (mean, p50, p95, p99, max in ms) per endpoint.
+
+Usage:
+    # Serve on 127.0.0.1:8765 with 2 worker processes:
+    python server.py --instances ../downloads/instances --bks ../data/instances.json --jobs 2
+
+    # Serve on a Unix socket:
+    python server.py --instances ../downloads/instances --unix /tmp/bdsp.sock
+
+    # Validate a solution:
+    curl --data-binary @solution.csv 'http://127.0.0.1:8765/validate?instance=realistic_10_1'
+
+With --jobs 0 the solutions are validated in a thread of the server process.
+ValidationService.handle answers a request without any socket, so the
+service can be exercised offline:
+
+    service = ValidationService(Path('../downloads/instances'), jobs=0)
+    status, result = asyncio.run(service.handle('POST', '/validate?instance=realistic_10_1', data))
+"""
+
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+import validator as _validator_module
+from data.instance import Instance
+from submission import fail, judge, new_result, validate_submission
+from utils.logging import get_logger
+
+INSTANCE_NAME_RE = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+# Same bound as the attachments of the issue submissions.
+MAX_BODY_BYTES = 30 * 1024 * 1024
+# Number of recent requests per endpoint the latency percentiles are computed on.
+LATENCY_WINDOW = 1000
+DEFAULT_CACHE_SIZE = 32
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Instance loader of the worker, an lru_cache set up by init_service_worker.
+load_instance = None
+
+
+def init_service_worker(instances_dir: str, cache_size: int) -> None:
+    """Set up the validator logger and the instance LRU cache of a worker."""
+    global load_instance
+    _validator_module.init_worker()
+
+    @lru_cache(maxsize=cache_size)
+    def load(instance_name: str) -> Instance:
+        instance = Instance.from_json(str(Path(instances_dir) / f'{instance_name}.json'))
+        instance.name = instance_name
+        return instance
+
+    load_instance = load
+
+
+def validate_solution(instance_name: str, data: bytes, solution_file: str) -> tuple:
+    """validate_submission of a solution in a worker, with its instance from the LRU cache."""
+    return validate_submission(load_instance(instance_name), solution_file, data)
+
+
+class LatencyMetrics:
+    """Request counts and the latencies of the last LATENCY_WINDOW requests, per endpoint."""
+
+    def __init__(self) -> None:
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, endpoint: str, status: int, seconds: float) -> None:
+        self.counts[endpoint] += 1
+        if status >= 400:
+            self.errors[endpoint] += 1
+        self.latencies[endpoint].append(seconds)
+
+    def summary(self) -> dict:
+        summary = {}
+        for endpoint, latencies in self.latencies.items():
+            ms = sorted(latency * 1e3 for latency in latencies)
+            summary[endpoint] = {
+                'requests': self.counts[endpoint],
+                'errors': self.errors[endpoint],
+                'mean_ms': round(sum(ms) / len(ms), 3),
+                'p50_ms': round(ms[int(0.50 * (len(ms) - 1))], 3),
+                'p95_ms': round(ms[int(0.95 * (len(ms) - 1))], 3),
+                'p99_ms': round(ms[int(0.99 * (len(ms) - 1))], 3),
+                'max_ms': round(ms[-1], 3),
+            }
+        return summary
+
+
+class ValidationService:
+    """Answer the requests of the server, see the module docstring.
+
+    The solutions are validated in a ProcessPoolExecutor of jobs workers
+    (jobs=0: one thread of this process); each worker keeps the last
+    cache_size instances it loaded. The best known solutions are read from
+    bks_file (data/instances.json), again whenever the file changes; without
+    it, previous_bks is None.
+    """
+
+    def __init__(self, instances_dir: Path, bks_file: Path = None, jobs: int = 1,
+                 cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.instances_dir = Path(instances_dir)
+        self.bks_file = Path(bks_file) if bks_file is not None else None
+        self.jobs = jobs
+        self.cache_size = cache_size
+        initargs = (str(self.instances_dir), cache_size)
+        if jobs > 0:
+            self.executor = ProcessPoolExecutor(jobs, initializer=init_service_worker, initargs=initargs)
+        else:
+            self.executor = ThreadPoolExecutor(1, initializer=init_service_worker, initargs=initargs)
+        self.metrics = LatencyMetrics()
+        self.started = time.time()
+        self.bks_entries = None
+        self.bks_mtime = None
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def bks_entry(self, instance_name: str):
+        """Entry of the instance in bks_file, {} without bks_file, None if the instance is not listed."""
+        if self.bks_file is None:
+            return {}
+        mtime = self.bks_file.stat().st_mtime_ns
+        if mtime != self.bks_mtime:
+            with open(self.bks_file, encoding='utf-8') as f:
+                self.bks_entries = {entry.get('name'): entry for entry in json.load(f)}
+            self.bks_mtime = mtime
+        return self.bks_entries.get(instance_name)
+
+    async def handle(self, method: str, target: str, body: bytes = b'') -> tuple:
+        """Answer one request.
+
+        Returns
+        -------
+        tuple
+            (HTTP status, JSON-serializable response)
+        """
+        start = time.perf_counter()
+        url = urlsplit(target)
+        routes = {'/validate': ('POST', self.validate),
+                  '/health': ('GET', self.health),
+                  '/metrics': ('GET', self.metrics_summary)}
+        if url.path not in routes:
+            status, response = 404, {'error': f'Unknown endpoint {url.path}'}
+        elif method != routes[url.path][0]:
+            status, response = 405, {'error': f'{url.path} expects {routes[url.path][0]}'}
+        else:
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            try:
+                status, response = await routes[url.path][1](query, body)
+            except Exception as e:
+                status, response = 500, {'error': f'{type(e).__name__}: {e}'}
+        self.metrics.record(url.path if url.path in routes else 'other', status,
+                            time.perf_counter() - start)
+        return status, response
+
+    async def health(self, query: dict, body: bytes) -> tuple:
+        return 200, {'status': 'ok',
+                     'uptime_s': round(time.time() - self.started, 3),
+                     'jobs': self.jobs,
+                     'cache_size': self.cache_size,
+                     'instances_dir': str(self.instances_dir),
+                     'bks_file': str(self.bks_file) if self.bks_file is not None else None}
+
+    async def metrics_summary(self, query: dict, body: bytes) -> tuple:
+        return 200, self.metrics.summary()
+
+    async def validate(self, query: dict, body: bytes) -> tuple:
+        """Validate the solution in body, same result as process_submission(apply=False)."""
+        instance_name = query.get('instance', '')
+        if not INSTANCE_NAME_RE.match(instance_name):
+            return 400, {'error': 'instance=<name> is required (letters, digits and _)'}
+        result = new_result(instance_name, query.get('author', 'anonymous'),
+                            query.get('file', f'{instance_name}.csv'))
+
+        entry = self.bks_entry(instance_name)
+        if entry is None:
+            return 200, fail(result, f"Unknown instance '{instance_name}'.")
+        if not (self.instances_dir / f'{instance_name}.json').is_file():
+            return 200, fail(result, f"No instance definition found for '{instance_name}'.")
+        result['previous_bks'] = entry.get('bks')
+        result['new_bks'] = entry.get('bks')
+
+        loop = asyncio.get_running_loop()
+        try:
+            validation = await loop.run_in_executor(
+                self.executor, validate_solution, instance_name, body, result['solution_file'])
+        except Exception as exc:  # malformed matrix, wrong width, etc.
+            return 200, fail(result, f'Could not parse/evaluate the solution: {exc}', 'invalid')
+        return 200, judge(result, validation, entry.get('lower_bound'))
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """HTTP/1.1 on one connection, kept alive until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(f'Negative Content-Length {length}')
+                except ValueError:
+                    status, response, keep_alive = 400, {'error': 'Malformed request'}, False
+                else:
+                    if length > MAX_BODY_BYTES:
+                        status, response = 413, {'error': f'Body over {MAX_BODY_BYTES // 2**20} MB'}
+                        keep_alive = False
+                    else:
+                        body = await reader.readexactly(length)
+                        status, response = await self.handle(method, target, body)
+                        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                content = (json.dumps(response) + '\n').encode()
+                writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                             f'Content-Type: application/json\r\n'
+                             f'Content-Length: {len(content)}\r\n'
+                             f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service: ValidationService, host: str, port: int, unix: str = None) -> None:
+    if unix:
+        server = await asyncio.start_unix_server(service.serve_connection, path=unix)
+        logger.info(f'Serving on unix:{unix}')
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        logger.info(f'Serving on http://{host}:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description='BDSP validation server')
+    parser.add_argument('--instances', default=str(_validator_module.INSTANCE_FOLDER),
+                        help='Folder of the instance JSON files')
+    parser.add_argument('--bks', default=None,
+                        help='data/instances.json, for the previous BKS and the lower bounds')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Serve on this Unix socket instead of TCP')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (0: validate in a thread of the server)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='Instances kept in memory by each worker')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_arguments()
+    service = ValidationService(Path(args.instances), args.bks, args.jobs, args.cache_size)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    logger = get_logger('server')
+    main()
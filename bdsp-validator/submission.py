@@ -0,0 +1,137 @@
+"""
+Submission gate shared by scripts/apply_submission.py and server.py.
+
+A submission is validated with the fail-fast validator, and its objective
+and per-employee breakdown are recomputed from the assignment matrix; the
+objective claimed by the submitter is never trusted. The verdict (invalid,
+valid_no_improvement or accepted, with the new gap and status) is then
+given against the best known solution stored for the instance.
+
+The caller must have set validator.logger (see validator.init_worker).
+"""
+
+from pathlib import Path
+
+import validator as _validator_module
+from data.instance import Instance
+
+# Violations reported for an invalid submission before validation stops.
+FAIL_FAST_VIOLATIONS = 5
+
+
+def new_result(instance_name: str, author: str, solution_file: str) -> dict:
+    """Result of a submission not validated yet (status "error")."""
+    return {
+        'instance': instance_name,
+        'author': author,
+        'solution_file': solution_file,
+        'status': 'error',
+        'valid': False,
+        'objective': None,
+        'previous_bks': None,
+        'new_bks': None,
+        'gap_pct': None,
+        'status_label': None,
+        'improved': False,
+        'applied': False,
+        'errors': [],
+        'message': '',
+    }
+
+
+def fail(result: dict, message: str, status: str = 'error') -> dict:
+    """result with the single error message and status."""
+    result['errors'] = [message]
+    result['status'] = status
+    result['message'] = message
+    return result
+
+
+def gap_and_status(bks: float, lower_bound) -> tuple:
+    """gap = (bks - lb) / bks * 100, as build_instance_data.py.
+
+    Returns
+    -------
+    tuple
+        (gap_pct, "optimal" or "open"), gap_pct None without lower bound
+    """
+    if bks is not None and lower_bound is not None and bks > 0:
+        gap_pct = round((bks - lower_bound) / bks * 100, 2)
+    else:
+        gap_pct = None
+    status = 'optimal' if gap_pct is not None and gap_pct == 0.0 else 'open'
+    return gap_pct, status
+
+
+def validate_submission(instance: Instance, solution_file: Path, data: bytes = None) -> tuple:
+    """Validate a submitted solution, read from solution_file or from data.
+
+    Validation stops after FAIL_FAST_VIOLATIONS violations. The breakdown
+    has the layout of the solution_breakdown of data/instances.json.
+
+    Returns
+    -------
+    tuple
+        (is_valid, objective, breakdown, errors), objective and breakdown None if not valid
+    """
+    validator = _validator_module.Validator(instance, solution_file, evaluate=False, data=data)
+    verdict = validator.validate_fast(FAIL_FAST_VIOLATIONS)
+    if not verdict['valid']:
+        return False, None, None, list(validator.errors)
+
+    objective = int(round(validator.solution.value))
+    breakdown = {
+        'total_objective': objective,
+        'feasible': bool(validator.solution.feasible),
+        'num_employees': len(validator.solution.employees),
+        'employees': [
+            {
+                'employee': r['employee'],
+                'feasible': bool(r['feasible']),
+                'objective': int(round(r['objective'])),
+                'work_time_paid': int(round(r['work_time_paid'])),
+                'total_time': int(round(r['total_time'])),
+                'ride': int(round(r['ride'])),
+                'vehicle_changes': int(round(r['vehicle_changes'])),
+                'split_shifts': int(round(r['split_shifts'])),
+                'drive_time': int(round(r['drive_time'])),
+                'num_legs': int(r['num_legs']),
+            }
+            for r in validator.get_breakdown()
+        ],
+    }
+    return True, objective, breakdown, list(validator.errors)
+
+
+def judge(result: dict, validation: tuple, lower_bound) -> dict:
+    """Fill result with the verdict of a validated submission.
+
+    result is a new_result whose previous_bks (and new_bks) is the stored
+    BKS of the instance, validation the tuple of validate_submission. The
+    submission is accepted if it is valid and strictly better than the
+    stored BKS (or there is none).
+    """
+    is_valid, objective, _, errors = validation
+    instance_name, prev_bks = result['instance'], result['previous_bks']
+    result['objective'] = objective
+    result['errors'] = errors
+    if not is_valid:
+        result['status'] = 'invalid'
+        result['message'] = 'Solution is infeasible or does not cover all legs exactly once.'
+        return result
+
+    result['valid'] = True
+    if prev_bks is not None and objective >= prev_bks:
+        result['status'] = 'valid_no_improvement'
+        result['message'] = f'Feasible, objective {objective} but not better than the current BKS {prev_bks}.'
+        return result
+
+    gap_pct, status_label = gap_and_status(objective, lower_bound)
+    result['status'] = 'accepted'
+    result['improved'] = True
+    result['new_bks'] = objective
+    result['gap_pct'] = gap_pct
+    result['status_label'] = status_label
+    delta = '' if prev_bks is None else f' (improved by {prev_bks - objective} over {prev_bks})'
+    result['message'] = f'New best known solution for {instance_name}: {objective}{delta}.'
+    return result
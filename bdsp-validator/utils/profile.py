@@ -0,0 +1,85 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import time
+import tracemalloc
+
+
+class StageTimer:
+    """Wall time, and optionally peak memory, of the named stages of a run
+    (the stages of Validator.stage, the instance loading, ...).
+
+    seconds[name] adds up the time of every with block of stage(name). With
+    memory=True, tracemalloc is started by the first stage (if it is not
+    already tracing, e.g. in the process a timer was sent to) and
+    peak_kb[name] keeps the largest peak of the memory traced during the
+    stage, above the memory traced when it started. Tracing slows the
+    stages down several times, so compare memory runs with memory runs
+    only. With memory, stages must not be nested: each one resets the
+    tracemalloc peak.
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.seconds = {}
+        self.peak_kb = {}
+        self.memory = memory
+
+    @contextmanager
+    def stage(self, name: str):
+        """Add the time (and peak memory) of the with block to stage name."""
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            if self.memory:
+                peak_kb = (tracemalloc.get_traced_memory()[1] - base) / 1024
+                self.peak_kb[name] = max(self.peak_kb.get(name, 0.0), peak_kb)
+
+    def as_dict(self) -> dict:
+        """{"phases": {name: {"seconds", "peak_kb"}}, "seconds", "peak_kb"}, JSON-serializable."""
+        peaks = list(self.peak_kb.values())
+        return {
+            'phases': {name: {'seconds': round(seconds, 6),
+                              'peak_kb': round(self.peak_kb[name], 1) if name in self.peak_kb else None}
+                       for name, seconds in self.seconds.items()},
+            'seconds': round(sum(self.seconds.values()), 6),
+            'peak_kb': round(max(peaks), 1) if peaks else None,
+        }
+
+
+class ProfileSummary:
+    """Aggregate of the StageTimer.as_dict of the files of a folder: per phase,
+    the number of files, the total and mean seconds, and the largest peak."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.phases = {}
+
+    def add(self, profile: dict, file: bool = True) -> None:
+        """Add a StageTimer.as_dict; file=False for phases of the folder itself
+        (e.g. the report written at the end), not counted as a file."""
+        self.files += int(file)
+        for name, phase in profile['phases'].items():
+            total = self.phases.setdefault(name, {'files': 0, 'seconds': 0.0, 'peak_kb': None})
+            total['files'] += 1
+            total['seconds'] += phase['seconds']
+            if phase['peak_kb'] is not None:
+                total['peak_kb'] = max(total['peak_kb'] or 0.0, phase['peak_kb'])
+
+    def as_dict(self) -> dict:
+        peaks = [phase['peak_kb'] for phase in self.phases.values() if phase['peak_kb'] is not None]
+        return {
+            'files': self.files,
+            'phases': {name: {'files': phase['files'],
+                              'seconds': round(phase['seconds'], 6),
+                              'mean_ms': round(phase['seconds'] / phase['files'] * 1e3, 3),
+                              'peak_kb': phase['peak_kb']}
+                       for name, phase in self.phases.items()},
+            'seconds': round(sum(phase['seconds'] for phase in self.phases.values()), 6),
+            'peak_kb': max(peaks) if peaks else None,
+        }
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from pathlib import Path
+import csv
+import json
+
+REPORT_FIELDS = ["filename", "Instances", "objective", "feasible", "errors"]
+
+
+class ReportWriter:
+    """Write the rows of a folder validation report one at a time.
+
+    The format is JSONL if the file name ends with .jsonl, CSV otherwise
+    (the errors joined by "; ", the breakdown as a JSON column). Every row
+    is flushed when written, so a partial report survives a crash. With
+    resume=True, an existing report is kept and appended to; its
+    incomplete last line (if any) is dropped and the file names it
+    records are in done.
+    """
+
+    def __init__(self, path: str, breakdown: bool = False, resume: bool = False) -> None:
+        self.path = Path(path)
+        self.jsonl = self.path.suffix == '.jsonl'
+        self.fields = REPORT_FIELDS + (["employees"] if breakdown else [])
+        self.done = set()
+        if resume and self.path.is_file():
+            self.done = self.read_done()
+        append = resume and self.path.is_file() and self.path.stat().st_size > 0
+        self.file = open(self.path, 'a' if append else 'w', newline='')
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fields)
+            if not append:
+                self.writer.writeheader()
+
+    def read_done(self) -> set:
+        """Drop the incomplete last line of the report and return the recorded file names."""
+        content = self.path.read_bytes()
+        complete = content[:content.rfind(b'\n') + 1]
+        if len(complete) != len(content):
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(complete))
+        lines = complete.decode().splitlines()
+        if self.jsonl:
+            return {json.loads(line)["filename"] for line in lines if line.strip()}
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is not None and reader.fieldnames != self.fields:
+            raise ValueError(f'Cannot resume {self.path}: columns {reader.fieldnames}, expected {self.fields}')
+        return {row["filename"] for row in reader}
+
+    def write(self, result: dict) -> None:
+        if self.jsonl:
+            self.file.write(json.dumps({field: result[field] for field in self.fields}) + '\n')
+        else:
+            row = {field: result[field] for field in self.fields}
+            row["errors"] = "; ".join(result["errors"])
+            if "employees" in row:
+                row["employees"] = json.dumps(row["employees"])
+            self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> ReportWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
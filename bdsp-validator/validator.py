@@ -9,27 +9,52 @@ Usage:
     # Validate a single solution file:
     python validator.py -m file -j instance.json -i solution.csv
 
+    # Stop at the first 5 violations and print a JSON verdict:
+    python validator.py -m file -j instance.json -i solution.csv --fail-fast 5
+
     # Validate a single solution and save objective breakdown:
     python validator.py -m file -j instance.json -i solution.csv -o breakdown.csv
 
+    # Solutions may also be in the sparse format (see convert.py):
+    python validator.py -m file -j instance.json -i solution.sparse
+
     # Validate all solutions in a folder (requires instances/ directory):
     python validator.py -m folder -i solutions/ -o report.csv
+
+    # Same, with 4 processes (same report):
+    python validator.py -m folder -i solutions/ -o report.csv --jobs 4
+
+    # Stream a JSONL report with breakdowns, resuming after an interruption:
+    python validator.py -m folder -i solutions/ -o report.jsonl --breakdown --resume
+
+    # Time and peak memory of each phase, per file and for the folder:
+    python validator.py -m folder -i solutions/ -o report.csv --profile profile.jsonl
 """
 
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 import os
 import argparse
 import time
 from pathlib import Path
 import csv
+import json
+import sys
 
 from data.solution import Solution
 from data.instance import Instance
-from data.employee import Employee
+from data.employee import Employee, EMPLOYEE_D_MAX, EMPLOYEE_T_MAX, EMPLOYEE_W_MAX
+from data.matrix import MatrixFormatError
+from data.cache import DiskCache, ResultCache, sources_version
+from data.screen import TIERS, screen_shift
 
 from utils.logging import get_logger
+from utils.profile import ProfileSummary, StageTimer
+from utils.report import ReportWriter
 
 INSTANCE_FOLDER = Path('instances')
+# Dense matrices (.csv) and sparse solutions (.sparse, see convert.py).
+SOLUTION_PATTERNS = ('*.csv', '*.sparse')
 
 
 def get_instance_name(file: str) -> str:
@@ -53,11 +78,7 @@ def get_instance_name(file: str) -> str:
         instance_name = instance_name[index_realistic:]
         instance_name = ('_').join(instance_name.split('_')[0:3])
 
-    instance_file = f'{INSTANCE_FOLDER}/{instance_name}.json'
-    try:
-        instance = Instance.from_json(instance_file)
-        instance.name = instance_name
-    except FileNotFoundError:
+    if not os.path.isfile(get_instance_file(instance_name)):
         logger.error(f'Instance file not found for {instance_name}')
 
     return instance_name
@@ -67,87 +88,236 @@ def get_instance_file(instance_name: str) -> str:
     return f'{INSTANCE_FOLDER}/{instance_name}.json'
 
 
+@lru_cache(maxsize=None)
+def file_digest(file: str) -> str:
+    """sha256 of a file, computed once per run."""
+    return DiskCache.key(Path(file).read_bytes())
+
+
+def validator_version() -> str:
+    """sha256 of every source that shapes a report row (validator.py, data/ and utils/),
+    so that any change to them invalidates the result cache."""
+    return sources_version('validator.py', 'data/*.py', 'utils/*.py')
+
+
+def format_timings(timings: dict) -> str:
+    """Format the stage timings of Validator.timings as "parse 0.012s, ..."."""
+    return ', '.join(f'{stage} {seconds:.3f}s' for stage, seconds in timings.items())
+
+
 class FolderValidator:
-    def __init__(self, solution_folder: str):
+    """Validate every solution file of a folder and write a report.
+
+    By default the evaluated solutions and the report rows are kept in
+    solutions and validation_results, and the report is written at the end.
+    With stream=True, each row is written (and flushed) to output_file as
+    soon as its file is validated and nothing is kept; with resume=True
+    (implies stream), the files already in output_file are skipped.
+    With breakdown=True, the rows also carry the per-employee breakdown.
+    With cache=True, the rows of unchanged (solution, instance) pairs are
+    read from the ResultCache instead of validating the file again; such
+    files are not in solutions, and the instances are loaded through the
+    InstanceCache.
+    With profile_output (a text stream), the stages of each file are also
+    measured in memory (see StageTimer) and its profile written there as a
+    JSON line, followed at the end by
+    the aggregate of the folder (see ProfileSummary).
+    """
+
+    def __init__(self, solution_folder: str, stream: bool = False, breakdown: bool = False,
+                 resume: bool = False, cache: bool = True, profile_output=None):
         self.solution_folder = Path(solution_folder)
         self.validation_results = []
         self.output_file = 'validation_report.csv'
         self.solutions = []
-
-    def validate_all(self):
-        """Validate all solutions in the folder."""
-        solution_files = list(self.solution_folder.glob("*.csv"))
+        self.timings = {}
+        self.stream = stream or resume
+        self.breakdown = breakdown
+        self.resume = resume
+        self.report_writer = None
+        self.cache = ResultCache.from_environment(validator_version()) if cache else None
+        self.profile_output = profile_output
+        self.profile_summary = ProfileSummary()
+
+    def validate_all(self, jobs: int = 1):
+        """Validate all solutions in the folder.
+
+        With jobs > 1, the files are grouped by instance and the groups are
+        validated by a pool of jobs processes; the results are collected in
+        the sorted file order, so the report is the same as with jobs=1.
+        Only the serial mode keeps the evaluated solutions in self.solutions.
+        """
+        solution_files = [file for pattern in SOLUTION_PATTERNS for file in self.solution_folder.glob(pattern)]
         solution_files.sort()
         logger.info(f'Found {len(solution_files)} solution files in {self.solution_folder}')
-        for iteration, solution_file in enumerate(solution_files):
-            instance_name = get_instance_name(str(solution_file))
-            instance_file = get_instance_file(instance_name)
-            logger.info(f'({iteration+1}/{len(solution_files)})\t Starting validation for {solution_file} instance {instance_name}')
-            instance = Instance.from_json(instance_file)
-            solution = Solution.from_file(instance, solution_file)
-            solution.evaluate()
-            self.solutions.append(solution)
-            validator = Validator(instance, solution_file)
-            is_valid = validator.validate()
-            self.validation_results.append({
-                "filename": solution_file.name,
-                "Instances": instance.name,
-                "objective": solution.value,
-                "feasible": is_valid,
-                "errors": validator.errors,
-            })
-        self.save_report()
+        if self.stream:
+            self.report_writer = ReportWriter(self.output_file, self.breakdown, self.resume)
+            if self.report_writer.done:
+                solution_files = [file for file in solution_files if file.name not in self.report_writer.done]
+                logger.info(f'Resuming {self.output_file}: {len(self.report_writer.done)} files already '
+                            f'recorded, {len(solution_files)} left')
+        try:
+            self.validate_files(solution_files, jobs)
+        finally:
+            if self.report_writer is not None:
+                self.report_writer.close()
+        if not self.stream:
+            timer = StageTimer(memory=self.profile_output is not None)
+            with timer.stage('report'):
+                self.save_report()
+            self.add_timings(timer.seconds)
+            if self.profile_output is not None:
+                self.profile_summary.add(timer.as_dict(), file=False)
+        logger.info(f'Stage timings: {format_timings(self.timings)}')
+        if self.profile_output is not None:
+            self.write_profile({'folder': str(self.solution_folder), **self.profile_summary.as_dict()})
+
+    def validate_files(self, solution_files: list, jobs: int):
+        if jobs > 1:
+            self.validate_parallel(solution_files, jobs)
+        else:
+            instances = {}
+            for iteration, solution_file in enumerate(solution_files):
+                instance_name = get_instance_name(str(solution_file))
+                logger.info(f'({iteration+1}/{len(solution_files)})\t Starting validation for {solution_file} instance {instance_name}')
+                timer = StageTimer(memory=self.profile_output is not None)
+                result, solution = validate_cached(instances, instance_name, solution_file,
+                                                   self.breakdown, self.cache, timer)
+                if solution is not None and not self.stream:
+                    self.solutions.append(solution)
+                self.add_result(result, timer)
+
+    def validate_parallel(self, solution_files: list, jobs: int):
+        """Validate the files in a process pool, one task per instance."""
+        groups = {}
+        for index, solution_file in enumerate(solution_files):
+            groups.setdefault(get_instance_name(str(solution_file)), []).append((index, solution_file))
+        results = {}
+        emitted = 0
+        profile = self.profile_output is not None
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+            tasks = [pool.submit(validate_group, instance_name, items, self.breakdown, self.cache, profile)
+                     for instance_name, items in sorted(groups.items(), key=lambda group: -len(group[1]))]
+            for task in as_completed(tasks):
+                for index, result, timer in task.result():
+                    results[index] = (result, timer)
+                while emitted in results:
+                    result, timer = results.pop(emitted)
+                    emitted += 1
+                    logger.info(f'({emitted}/{len(solution_files)})\t Validated {solution_files[emitted - 1]} '
+                                f'instance {result["Instances"]}')
+                    self.add_result(result, timer)
+
+    def add_result(self, result: dict, timer: StageTimer):
+        with timer.stage('report'):
+            if self.stream:
+                self.report_writer.write(result)
+            else:
+                self.validation_results.append(result)
+        self.add_timings(timer.seconds)
+        if self.profile_output is not None:
+            file_profile = {'file': result["filename"], 'instance': result["Instances"], **timer.as_dict()}
+            self.profile_summary.add(file_profile)
+            self.write_profile(file_profile)
+
+    def add_timings(self, timings: dict):
+        for stage, seconds in timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def write_profile(self, profile: dict):
+        self.profile_output.write(json.dumps(profile) + '\n')
+        self.profile_output.flush()
 
     def save_report(self):
-        """Save validation results to a CSV file."""
-        with open(self.output_file, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=["filename", "Instances", "objective", "feasible", "errors"])
-            writer.writeheader()
+        """Save validation results to a CSV (or .jsonl) file."""
+        with ReportWriter(self.output_file, self.breakdown) as writer:
             for result in self.validation_results:
-                writer.writerow({
-                    "filename": result["filename"],
-                    "Instances": result["Instances"],
-                    "feasible": result["feasible"],
-                    "objective": result["objective"],
-                    "errors": "; ".join(result["errors"]),
-                })
+                writer.write(result)
 
 
 class Validator:
-    def __init__(self, instance: Instance, solution_file: str):
+    """Validate one solution file.
+
+    The file is parsed and evaluated once, in __init__. The coverage,
+    feasibility, objective and breakdown stages all read that evaluation
+    (employee.state, employee.objective, solution.value). The stages are
+    timed by timer, a new StageTimer unless one is given (e.g. one also
+    measuring memory, or already holding the instance loading), and the
+    seconds spent in each stage are accumulated in timings (timer.seconds).
+    With evaluate=False, the evaluation is left to validate_fast.
+    The content of the file can be given as data instead of being read
+    from solution_file (e.g. a solution received by server.py).
+    """
+
+    def __init__(self, instance: Instance, solution_file: str, evaluate: bool = True, data: bytes = None,
+                 timer: StageTimer = None):
         self.instance = instance
-        self.solution = Solution.from_file(instance, solution_file)
-        self.solution.evaluate()
+        self.timer = timer if timer is not None else StageTimer()
+        self.timings = self.timer.seconds
+        with self.stage('parse'):
+            if data is None:
+                self.solution = Solution.from_file(instance, solution_file)
+            else:
+                self.solution = Solution.from_bytes(instance, data)
+        if evaluate:
+            with self.stage('evaluate'):
+                self.solution.evaluate()
         self.errors = []
 
+    def stage(self, name: str):
+        """Add the time spent in the with block to timings[name] (see StageTimer.stage)."""
+        return self.timer.stage(name)
+
     def validate_legs(self) -> bool:
         """Validate the legs in the solution."""
-        legs_instance = set(self.instance.legs)
-        legs_solution = set(leg for employee in self.solution.employees for leg in employee.legs)
-        unassigned_legs = legs_instance - legs_solution
-        duplicate_legs = [leg for leg, count in Counter(legs_solution).items() if count > 1]
+        with self.stage('coverage'):
+            return self._validate_legs()
 
-        if unassigned_legs:
-            self.errors.append(f'Unassigned legs: {unassigned_legs}')
-            return False
-        if duplicate_legs:
-            self.errors.append(f'Duplicate legs: {duplicate_legs}')
-            return False
-        return True
+    def _validate_legs(self) -> bool:
+        coverage = self.solution.coverage()
+        self.errors.extend(coverage.errors())
+        return coverage.covered
 
     def validate_employees(self) -> bool:
         """Validate the employees in the solution."""
+        with self.stage('feasibility'):
+            return self._validate_employees()
+
+    def _validate_employees(self) -> bool:
         valid = True
-        self.solution.evaluate()
         for employee in self.solution.employees:
             if not employee.state.feasible:
                 valid = False
-                self.errors.append(f'Employee {employee.name} is not feasible')
+                self.errors.append(f'Employee {employee.name} is not feasible'
+                                   + self.describe_connections(employee))
         return valid
 
+    def describe_connections(self, employee: Employee) -> str:
+        """Name the consecutive legs of the employee that cannot follow each other.
+
+        Each pair is checked against the distance matrix with the rule of
+        State.evaluate_bus_penalty, in O(1): this runs on the error paths
+        (validate, validate_fast), which must not pay for building
+        Instance.successor_index.
+        """
+        if employee.state.bus_penalty <= 0:
+            return ''
+        distance = self.instance.distance_matrix
+        pairs = []
+        for leg_i, leg_j in zip(employee.legs, employee.legs[1:]):
+            if leg_i.tour == leg_j.tour and leg_i.end_pos == leg_j.start_pos:
+                continue
+            diff = leg_j.start - leg_i.end
+            if diff < distance[int(leg_i.end_pos)][int(leg_j.start_pos)] or diff < 0:
+                pairs.append(f'{leg_i}->{leg_j}')
+        return f' (no bus connection: {", ".join(pairs)})' if pairs else ''
+
     def validate_objective(self) -> bool:
         """Validate the objective value of the solution."""
-        self.solution.evaluate()
+        with self.stage('objective'):
+            return self._validate_objective()
+
+    def _validate_objective(self) -> bool:
         calculated_value = sum(employee.objective for employee in self.solution.employees)
         if self.solution.value != calculated_value:
             self.errors.append(f'Objective value {self.solution.value} does not match the calculated value {calculated_value}')
@@ -173,8 +343,117 @@ class Validator:
         self.report()
         return valid
 
+    def validate_fast(self, max_violations: int = 1) -> dict:
+        """Fail-fast validation, for a Validator created with evaluate=False.
+
+        The checks run from the cheapest to the most expensive, and stop as
+        soon as max_violations violations are found:
+
+        1. coverage: every leg assigned exactly once;
+        2. screens, for each shift: span (start_work of the first leg to
+           end_work of the last) over EMPLOYEE_T_MAX, and summed drive time
+           over EMPLOYEE_D_MAX, both sure hard-constraint violations
+           (screen_shift of data/screen.py);
+        3. the full evaluation of each shift, in order, skipping the shifts
+           already flagged by a screen.
+
+        tiers counts the shifts each tier resolved: flagged by the span or
+        the drive screen (by the first one, if both), or evaluated ('full').
+        If there is no violation, every shift has been evaluated and the
+        solution has its value, as after Solution.evaluate().
+
+        Parameters
+        ----------
+        max_violations : int
+            number of violations after which the validation stops
+
+        Returns
+        -------
+        dict
+            verdict: valid, complete (False if stopped early), objective
+            (None unless valid), violations (dicts with check, employee,
+            message and details), employees_screened, employees_evaluated,
+            tiers and the stage timings. The messages are also put in errors.
+        """
+        violations = []
+        screened = evaluated = 0
+        tiers = dict.fromkeys(TIERS, 0)
+        with self.stage('coverage'):
+            coverage = self.solution.coverage()
+            messages = iter(coverage.errors())
+            for count, legs in ((coverage.unassigned, coverage.unassigned_sample),
+                                (coverage.duplicates, coverage.duplicate_sample)):
+                if count:
+                    message = next(messages)
+                    if len(violations) < max_violations:
+                        violations.append({'check': 'coverage', 'employee': None, 'message': message,
+                                           'legs': legs, 'count': count})
+
+        flagged = set()
+        with self.stage('screen'):
+            for employee in self.solution.employees:
+                if len(violations) >= max_violations:
+                    break
+                screened += 1
+                if not employee.legs:
+                    continue
+                for check, value, limit in screen_shift(employee.legs, self.instance):
+                    if len(violations) < max_violations:
+                        if employee.name not in flagged:
+                            flagged.add(employee.name)
+                            tiers[check] += 1
+                        violations.append({'check': check, 'employee': employee.name,
+                                           'message': f'Employee {employee.name} is not feasible: '
+                                                      f'{check} {value} > {limit}',
+                                           'value': value, 'limit': limit})
+
+        with self.stage('evaluate'):
+            for employee in self.solution.employees:
+                if len(violations) >= max_violations:
+                    break
+                if employee.name in flagged:
+                    continue
+                evaluated += 1
+                tiers['full'] += 1
+                employee.evaluate()
+                if employee.state.feasible is False:
+                    state = employee.state
+                    penalties = {'bus_penalty': state.bus_penalty,
+                                 'drive_penalty': state.drive_penalty,
+                                 'rest_penalty': state.rest_penalty,
+                                 'drive_time': max(state.drive_time - EMPLOYEE_D_MAX, 0),
+                                 'total_time': max(state.total_time - EMPLOYEE_T_MAX, 0),
+                                 'work_time': max(state.work_time - EMPLOYEE_W_MAX, 0)}
+                    penalties = {name: value for name, value in penalties.items() if value > 0}
+                    violations.append({'check': 'shift', 'employee': employee.name,
+                                       'message': f'Employee {employee.name} is not feasible'
+                                                  + self.describe_connections(employee),
+                                       'penalties': penalties})
+
+        valid = not violations
+        if valid:
+            self.solution.value = sum(employee.objective for employee in self.solution.employees)
+            self.solution.feasible = True
+        self.errors = [violation['message'] for violation in violations]
+        self.report()
+        return {
+            'valid': valid,
+            'complete': screened == len(self.solution.employees)
+                        and evaluated + len(flagged) == len(self.solution.employees),
+            'objective': self.solution.value if valid else None,
+            'violations': violations,
+            'employees_screened': screened,
+            'employees_evaluated': evaluated,
+            'tiers': tiers,
+            'timings': dict(self.timings),
+        }
+
     def write_objective(self, output_file: str) -> None:
         """Write per-employee objective breakdown to CSV."""
+        with self.stage('breakdown'):
+            self._write_objective(output_file)
+
+    def _write_objective(self, output_file: str) -> None:
         header = ['Employee', 'Feasible',
                   'Objective', "W'", 'T', 'ride', 'tour', 'split',
                   'bus_penalty', 'drive_penalty', 'rest_penalty',
@@ -210,6 +489,10 @@ class Validator:
         Used by the website build pipeline to embed breakdown data
         in instances.json.
         """
+        with self.stage('breakdown'):
+            return self._get_breakdown()
+
+    def _get_breakdown(self) -> list:
         rows = []
         for e in self.solution.employees:
             rows.append({
@@ -227,6 +510,112 @@ class Validator:
         return rows
 
 
+def validate_file(instance: Instance, solution_file: Path, breakdown: bool = False,
+                  timer: StageTimer = None) -> tuple:
+    """Validate one file of a folder.
+
+    A malformed file is reported as infeasible, with the parser error,
+    instead of stopping the validation of the folder. With breakdown, the
+    row has the per-employee breakdown of Validator.get_breakdown in "employees".
+    The stages are timed by timer, if given (see Validator).
+
+    Returns
+    -------
+    tuple
+        (row of the folder report, evaluated solution or None)
+    """
+    try:
+        validator = Validator(instance, solution_file, timer=timer)
+    except MatrixFormatError as e:
+        logger.error(f'{solution_file}: {e}')
+        return {
+            "filename": solution_file.name,
+            "Instances": instance.name,
+            "objective": None,
+            "feasible": False,
+            "errors": [f'Malformed solution file: {e}'],
+            "employees": [],
+        }, None
+    is_valid = validator.validate()
+    result = {
+        "filename": solution_file.name,
+        "Instances": instance.name,
+        "objective": validator.solution.value,
+        "feasible": is_valid,
+        "errors": validator.errors,
+    }
+    if breakdown:
+        result["employees"] = validator.get_breakdown()
+    return result, validator.solution
+
+
+def init_worker():
+    """Set up the module logger in the processes of FolderValidator.validate_parallel."""
+    global logger
+    logger = get_logger('validator')
+
+
+def validate_cached(instances: dict, instance_name: str, solution_file: Path, breakdown: bool = False,
+                    cache: ResultCache = None, timer: StageTimer = None) -> tuple:
+    """validate_file, reading and filling the result cache.
+
+    The instance is loaded into instances (by name) only if the file is
+    not in the cache, through the instance cache if the result cache is
+    used. Cached rows always have their breakdown, which is
+    dropped unless breakdown is set. The cache lookup and the instance
+    loading are timed by timer, if given, as the 'cache' and 'load'
+    stages, next to the stages of the Validator.
+
+    Returns
+    -------
+    tuple
+        (row of the folder report, evaluated solution or None if cached)
+    """
+    if timer is None:
+        timer = StageTimer()
+    key = None
+    if cache is not None:
+        with timer.stage('cache'):
+            key = cache.result_key(Path(solution_file).read_bytes(), file_digest(get_instance_file(instance_name)))
+            result = cache.get(key)
+        if result is not None:
+            result["filename"] = solution_file.name
+            if not breakdown:
+                result.pop("employees", None)
+            return result, None
+    if instance_name not in instances:
+        with timer.stage('load'):
+            instances[instance_name] = Instance.from_json(get_instance_file(instance_name),
+                                                          use_cache=cache is not None)
+    result, solution = validate_file(instances[instance_name], solution_file,
+                                     breakdown or cache is not None, timer)
+    if cache is not None:
+        cache.put(key, result)
+        if not breakdown:
+            result = {field: value for field, value in result.items() if field != "employees"}
+    return result, solution
+
+
+def validate_group(instance_name: str, items: list, breakdown: bool = False, cache: ResultCache = None,
+                   profile: bool = False) -> list:
+    """Validate the (index, file) items of one instance, loading the instance once
+    (and only if some file is not in the cache). With profile, the
+    stages are also measured in memory.
+
+    Returns
+    -------
+    list
+        (index, report row, StageTimer of its stages) for each item
+    """
+    instances = {}
+    results = []
+    for index, solution_file in items:
+        timer = StageTimer(memory=profile)
+        result, _ = validate_cached(instances, instance_name, solution_file, breakdown, cache, timer)
+        results.append((index, result, timer))
+    return results
+
+
 def parse_arguments() -> argparse.Namespace:
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description='BDSP Solution Validator')
@@ -238,10 +627,27 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument('--instance_file', '-inst', required=False, type=str,
                         help='Instance name (auto-resolves to instances/<name>.json)')
     parser.add_argument('--input', '-i', required=True, type=str,
-                        help='Solution CSV file (file mode) or folder of CSVs (folder mode)')
+                        help='Solution file, dense CSV or sparse (file mode) or folder of solutions (folder mode)')
     parser.add_argument('--output', '-o', required=False, type=str,
                         help='Output file for objective breakdown (file mode) or report (folder mode)')
+    parser.add_argument('--jobs', required=False, type=int, default=1,
+                        help='Number of processes validating the solutions (folder mode)')
+    parser.add_argument('--fail-fast', required=False, type=int, nargs='?', const=1, default=None, metavar='K',
+                        help='Stop at the first (or K-th) violation and print a JSON verdict (file mode)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write each report row as soon as its file is validated (folder mode)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Append to an existing report, skipping the files it records (folder mode, implies --stream)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Validate every file again instead of reading unchanged ones from the result cache (folder mode)')
+    parser.add_argument('--breakdown', action='store_true',
+                        help='Add the per-employee breakdown to the report rows (folder mode)')
+    parser.add_argument('--profile', required=False, type=str, nargs='?', const='-', default=None, metavar='FILE',
+                        help='Write the time and peak memory of each phase as JSON lines to FILE '
+                             '(default: stdout), one per file and an aggregate in folder mode')
     args = parser.parse_args()
+    if args.fail_fast is not None and args.fail_fast < 1:
+        parser.error(f'--fail-fast K must be at least 1, got {args.fail_fast}')
 
     if args.mode == 'file' and not os.path.isfile(args.input):
         raise FileNotFoundError(f"Input file {args.input} does not exist.")
@@ -254,28 +660,49 @@ def parse_arguments() -> argparse.Namespace:
 def main():
     args = parse_arguments()
     start = time.perf_counter()
+    profile_output = None
+    if args.profile is not None:
+        profile_output = sys.stdout if args.profile == '-' else open(args.profile, 'w')
 
     if args.mode == 'file':
-        if args.instance_json:
-            instance = Instance.from_json(args.instance_json)
-        else:
-            instance_name = get_instance_name(args.input)
-            instance_file = get_instance_file(instance_name)
-            instance = Instance.from_json(instance_file)
+        timer = StageTimer(memory=profile_output is not None)
+        with timer.stage('load'):
+            if args.instance_json:
+                instance = Instance.from_json(args.instance_json)
+            else:
+                instance_name = get_instance_name(args.input)
+                instance_file = get_instance_file(instance_name)
+                instance = Instance.from_json(instance_file)
 
         logger.info(f'Validating {instance.name}\t filename: {args.input}')
-        validator = Validator(instance, Path(args.input))
-        validator.validate()
+        if args.fail_fast is not None:
+            validator = Validator(instance, Path(args.input), evaluate=False, timer=timer)
+            verdict = validator.validate_fast(args.fail_fast)
+            print(json.dumps(verdict, indent=2))
+            if not verdict['valid']:
+                args.output = None
+        else:
+            validator = Validator(instance, Path(args.input), timer=timer)
+            validator.validate()
         if args.output:
             validator.write_objective(args.output)
+        logger.info(f'Stage timings: {format_timings(validator.timings)}')
+        if profile_output is not None:
+            profile_output.write(json.dumps({'file': Path(args.input).name, 'instance': instance.name,
+                                             **timer.as_dict()}) + '\n')
 
     elif args.mode == 'folder':
-        folder_validator = FolderValidator(args.input)
+        folder_validator = FolderValidator(args.input, stream=args.stream, breakdown=args.breakdown,
+                                           resume=args.resume, cache=not args.no_cache,
+                                           profile_output=profile_output)
         if args.output:
             folder_validator.output_file = args.output
-        folder_validator.validate_all()
+        folder_validator.validate_all(args.jobs)
         logger.info('Completely finished after %.2f seconds.' % (time.perf_counter() - start))
 
+    if profile_output is not None and profile_output is not sys.stdout:
+        profile_output.close()
+
 
 if __name__ == '__main__':
     logger = get_logger('validator')
@@ -58,7 +58,8 @@ INSTANCES_JSON = REPO_ROOT / "data" / "instances.json"
 INSTANCES_JS = REPO_ROOT / "data" / "instances.js"
 
 # ---------------------------------------------------------------------------
-# Import the bundled validator. validator.py only defines its module-level
+# Import the bundled validator and its submission gate (submission.py, shared
+# with the validation server). validator.py only defines its module-level
 # ``logger`` inside its ``__main__`` block, so we provide one before importing
 # the Validator class (otherwise Validator.report() raises NameError).
 # ---------------------------------------------------------------------------
@@ -68,8 +69,8 @@ import validator as _validator_module  # noqa: E402
 if not hasattr(_validator_module, "logger"):
     _validator_module.logger = logging.getLogger("bdsp-validator")
 
-from validator import Validator  # noqa: E402
 from data.instance import Instance as ValidatorInstance  # noqa: E402
+from submission import fail, judge, new_result, validate_submission  # noqa: E402
 
 
 class SubmissionError(Exception):
@@ -88,16 +89,6 @@ def _instance_json_path(instance_name: str) -> Path:
     return DOWNLOADS_INSTANCES_DIR / f"{instance_name}.json"
 
 
-def _compute_gap_and_status(bks: float, lower_bound):
-    """Mirror build_instance_data.py: gap = (bks - lb) / bks * 100."""
-    if bks is not None and lower_bound is not None and bks > 0:
-        gap_pct = round((bks - lower_bound) / bks * 100, 2)
-    else:
-        gap_pct = None
-    status = "optimal" if gap_pct is not None and gap_pct == 0.0 else "open"
-    return gap_pct, status
-
-
 def _validate(instance_name: str, solution_path: Path):
     """Run the bundled validator. Returns (is_valid, objective, breakdown, errors)."""
     inst_file = _instance_json_path(instance_name)
@@ -110,31 +101,7 @@ def _validate(instance_name: str, solution_path: Path):
     v_instance = ValidatorInstance.from_json(str(inst_file))
     v_instance.name = instance_name
     # Solution.from_file calls path.open(), so pass a Path, not a str.
-    validator = Validator(v_instance, Path(solution_path))
-    is_valid = validator.validate()
-
-    objective = int(round(validator.solution.value))
-    breakdown = {
-        "total_objective": objective,
-        "feasible": bool(validator.solution.feasible),
-        "num_employees": len(validator.solution.employees),
-        "employees": [
-            {
-                "employee": r["employee"],
-                "feasible": bool(r["feasible"]),
-                "objective": int(round(r["objective"])),
-                "work_time_paid": int(round(r["work_time_paid"])),
-                "total_time": int(round(r["total_time"])),
-                "ride": int(round(r["ride"])),
-                "vehicle_changes": int(round(r["vehicle_changes"])),
-                "split_shifts": int(round(r["split_shifts"])),
-                "drive_time": int(round(r["drive_time"])),
-                "num_legs": int(r["num_legs"]),
-            }
-            for r in validator.get_breakdown()
-        ],
-    }
-    return is_valid, objective, breakdown, list(validator.errors)
+    return validate_submission(v_instance, Path(solution_path))
 
 
 def process_submission(
@@ -148,27 +115,10 @@ def process_submission(
     date = date or datetime.date.today().isoformat()
     instance_name = _resolve_instance_name(solution_path, instance_name)
 
-    result = {
-        "instance": instance_name,
-        "author": author,
-        "solution_file": solution_path.name,
-        "status": "error",
-        "valid": False,
-        "objective": None,
-        "previous_bks": None,
-        "new_bks": None,
-        "gap_pct": None,
-        "status_label": None,
-        "improved": False,
-        "applied": False,
-        "errors": [],
-        "message": "",
-    }
+    result = new_result(instance_name, author, solution_path.name)
 
     if not solution_path.exists():
-        result["errors"] = [f"Solution file not found: {solution_path}"]
-        result["message"] = result["errors"][0]
-        return result
+        return fail(result, f"Solution file not found: {solution_path}")
 
     # Locate the instance entry in the committed data.
     if not INSTANCES_JSON.exists():
@@ -177,9 +127,7 @@ def process_submission(
         instances = json.load(f)
     index = next((i for i, e in enumerate(instances) if e.get("name") == instance_name), None)
     if index is None:
-        result["errors"] = [f"Unknown instance '{instance_name}'."]
-        result["message"] = result["errors"][0]
-        return result
+        return fail(result, f"Unknown instance '{instance_name}'.")
 
     entry = instances[index]
     prev_bks = entry.get("bks")
@@ -188,43 +136,17 @@ def process_submission(
 
     # Validate (recomputes feasibility + objective from the matrix).
     try:
-        is_valid, objective, breakdown, errors = _validate(instance_name, solution_path)
+        validation = _validate(instance_name, solution_path)
     except SubmissionError:
         raise
     except Exception as exc:  # malformed CSV, wrong width, etc.
-        result["errors"] = [f"Could not parse/evaluate the solution: {exc}"]
-        result["status"] = "invalid"
-        result["message"] = result["errors"][0]
-        return result
-
-    result["objective"] = objective
-    result["errors"] = errors
+        return fail(result, f"Could not parse/evaluate the solution: {exc}", "invalid")
 
-    if not is_valid:
-        result["status"] = "invalid"
-        result["message"] = "Solution is infeasible or does not cover all legs exactly once."
+    # Verdict: accepted only if valid and strictly better than the stored BKS.
+    judge(result, validation, entry.get("lower_bound"))
+    if result["status"] != "accepted":
         return result
-
-    result["valid"] = True
-
-    # Improvement check: strictly better than the stored BKS.
-    improved = prev_bks is None or objective < prev_bks
-    if not improved:
-        result["status"] = "valid_no_improvement"
-        result["message"] = (
-            f"Feasible, objective {objective} but not better than the current BKS {prev_bks}."
-        )
-        return result
-
-    # Accepted.
-    gap_pct, status_label = _compute_gap_and_status(objective, entry.get("lower_bound"))
-    result["status"] = "accepted"
-    result["improved"] = True
-    result["new_bks"] = objective
-    result["gap_pct"] = gap_pct
-    result["status_label"] = status_label
-    delta = "" if prev_bks is None else f" (improved by {prev_bks - objective} over {prev_bks})"
-    result["message"] = f"New best known solution for {instance_name}: {objective}{delta}."
+    objective, breakdown = validation[1], validation[2]
 
     if apply:
         # 1. Patch the instance entry in place.
@@ -233,8 +155,8 @@ def process_submission(
         entry["bks_source"] = "community"
         entry["submitted_by"] = author
         entry["submitted_at"] = date
-        entry["gap_pct"] = gap_pct
-        entry["status"] = status_label
+        entry["gap_pct"] = result["gap_pct"]
+        entry["status"] = result["status_label"]
         entry["solution_breakdown"] = breakdown
         instances[index] = entry
 
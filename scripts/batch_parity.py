@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Parity check of the evaluation kernel against State.evaluate.
+
+Evaluates every sols/<name>.csv against downloads/instances/<name>.json with
+both evaluate_shift (bdsp-validator/data/employee.py, the kernel of
+Solution.evaluate) and the rule-by-rule reference State.evaluate, and
+requires every per-employee field to be equal in value and type (so the
+breakdown files written from either are identical).
+Also runs the fail-fast Validator.validate_fast over every shift, requires
+every shift flagged by its cheap-bound screen (screen_shift) to be
+infeasible, and prints the summed counts of the shifts each tier resolved
+(its verdict's tiers).
+
+Then scores --moves random moves per solution of each kind of
+Solution.evaluate_moves (relocate, swap, tail exchange, two-step chain):
+the objective delta and feasibility must equal those of Solution.evaluate
+on a copy of the solution with the move applied, and moves between an
+employee and itself or of a leg the employee does not have must raise
+ValueError.
+
+Then probes --probes random moves per solution with Employee.try_add /
+try_remove (a leg of another employee added, or one of the employee's legs
+removed), each committed or rolled back at random: the probed objective and
+feasibility, and after commit every state field, must equal State.evaluate
+of the shift with the move applied, and screen_shift must not flag a
+feasible moved shift; rollback must leave the legs unchanged.
+
+Usage:
+    python scripts/batch_parity.py [--only <name>] [--seed <n>] [--moves <n>] [--probes <n>] [--verbose]
+
+Exit code 0 = all solutions agree, 1 = any mismatch.
+
+Requires: sortedcontainers (pip install sortedcontainers).
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VALIDATOR_DIR = REPO_ROOT / "bdsp-validator"
+SOLUTIONS_DIR = REPO_ROOT / "sols"
+DOWNLOADS_INSTANCES_DIR = REPO_ROOT / "downloads" / "instances"
+
+sys.path.insert(0, str(VALIDATOR_DIR))
+import validator as _validator_module  # noqa: E402
+
+if not hasattr(_validator_module, "logger"):
+    _validator_module.logger = logging.getLogger("bdsp-validator")
+_validator_module.logger.setLevel(logging.CRITICAL)
+
+from data.instance import Instance  # noqa: E402
+from data.solution import Solution  # noqa: E402
+from data.screen import TIERS, screen_shift  # noqa: E402
+from validator import Validator  # noqa: E402
+from data.employee import FIELDS, Employee, State, check_parity, evaluate_shift  # noqa: E402
+from sortedcontainers import SortedList  # noqa: E402
+
+MAX_DIFFS_PER_INSTANCE = 5
+
+
+def reference_state(legs: list, instance) -> State:
+    """State.evaluate of a detached employee made of legs."""
+    employee = Employee(0, instance)
+    employee.legs = SortedList(legs)
+    state = State(employee)
+    state.cost = state.evaluate()
+    return state
+
+
+def moved_solution(solution, new_legs: dict) -> Solution:
+    """Evaluated copy of solution whose employees in new_legs have those legs."""
+    employees = []
+    for employee in solution.employees:
+        copy = Employee(employee.id, solution.instance)
+        copy.name = employee.name
+        copy.legs = SortedList(new_legs.get(employee, employee.legs))
+        employees.append(copy)
+    moved = Solution(employees)
+    moved.evaluate()
+    return moved
+
+
+def format_move(move: tuple) -> str:
+    """relocate(12, E3, E7), with the employees by name."""
+    def part(value):
+        if isinstance(value, Employee):
+            return value.name
+        if isinstance(value, (list, tuple)):
+            return "(" + ", ".join(part(item) for item in value) + ")"
+        return str(value)
+    return move[0] + part(move[1:])
+
+
+def random_move(solution, rng: random.Random) -> tuple:
+    """A random move of Solution.evaluate_moves and the new legs of the employees it changes."""
+    a, b, c = rng.sample([employee for employee in solution.employees if employee.legs], 3)
+    leg_a, leg_b = rng.choice(list(a.legs)), rng.choice(list(b.legs))
+    kind = rng.choice(("relocate", "swap", "tail", "chain"))
+    if kind == "relocate":
+        return (kind, leg_a, a, b), {a: [l for l in a.legs if l is not leg_a], b: sorted([*b.legs, leg_a])}
+    if kind == "swap":
+        return (kind, a, leg_a, b, leg_b), {a: sorted([*(l for l in a.legs if l is not leg_a), leg_b]),
+                                            b: sorted([*(l for l in b.legs if l is not leg_b), leg_a])}
+    if kind == "tail":
+        cut = leg_a.start
+        return (kind, a, b, cut), {a: [l for l in a.legs if l.start < cut] + [l for l in b.legs if l.start >= cut],
+                                   b: [l for l in b.legs if l.start < cut] + [l for l in a.legs if l.start >= cut]}
+    # leg_a goes from a to b, then leg_b from b to c.
+    return (kind, [(leg_a, a, b), (leg_b, b, c)]), {a: [l for l in a.legs if l is not leg_a],
+                                                     b: sorted([*(l for l in b.legs if l is not leg_b), leg_a]),
+                                                     c: sorted([*c.legs, leg_b])}
+
+
+def check_moves(solution, rng: random.Random, moves: int) -> list:
+    """Mismatches of random evaluate_moves against Solution.evaluate with the move applied."""
+    diffs = []
+    solution.evaluate()
+    if sum(1 for employee in solution.employees if employee.legs) < 3:
+        return diffs
+    for _ in range(moves):
+        move, new_legs = random_move(solution, rng)
+        (delta, feasible), = solution.evaluate_moves([move])
+        moved = moved_solution(solution, new_legs)
+        expected = moved.value - solution.value
+        expected_feasible = all(employee.state.feasible for employee in moved.employees
+                                if any(employee.id == changed.id for changed in new_legs))
+        if not math.isclose(delta, expected, rel_tol=1e-9, abs_tol=1e-6) or feasible != expected_feasible:
+            diffs.append(f"{format_move(move)}: evaluate_moves ({delta!r}, {feasible}) != "
+                         f"Solution.evaluate ({expected!r}, {expected_feasible})")
+
+    a, b = [employee for employee in solution.employees if employee.legs][:2]
+    leg_a, leg_b = a.legs[0], b.legs[0]
+    for move in (("relocate", leg_a, a, a), ("relocate", leg_b, a, b), ("swap", a, leg_a, a, leg_a),
+                 ("swap", a, leg_b, b, leg_b), ("tail", a, a, leg_a.start), ("chain", [(leg_b, a, b)])):
+        try:
+            solution.evaluate_moves([move])
+        except ValueError:
+            continue
+        diffs.append(f"{format_move(move)}: no ValueError for an invalid move")
+    return diffs
+
+
+def check_probes(solution, rng: random.Random, probes: int) -> list:
+    """Mismatches of random try_add/try_remove/commit/rollback against State.evaluate."""
+    diffs = []
+    instance_legs = list(solution.instance.legs)
+    employees = [employee for employee in solution.employees if employee.legs]
+    for _ in range(probes):
+        employee = rng.choice(employees)
+        legs = list(employee.legs)
+        if len(legs) > 1 and rng.random() < 0.5:
+            leg = rng.choice(legs)
+            move = f"{employee.name} try_remove({leg})"
+            probed = employee.try_remove(leg)
+            moved = [other for other in legs if other is not leg]
+        else:
+            leg = rng.choice([other for other in instance_legs if other not in employee.legs])
+            move = f"{employee.name} try_add({leg})"
+            probed = employee.try_add(leg)
+            moved = sorted(legs + [leg])
+        reference = reference_state(moved, solution.instance)
+        expected = (reference.cost, reference.feasible)
+        if probed != expected or [type(v) for v in probed] != [type(v) for v in expected]:
+            diffs.append(f"{move}: probed {probed!r} != State.evaluate {expected!r}")
+        if reference.feasible and screen_shift(moved, solution.instance):
+            diffs.append(f"{move}: screen {screen_shift(moved, solution.instance)} but State.evaluate feasible")
+        if rng.random() < 0.5:
+            objective = employee.commit()
+            if objective != reference.cost or list(employee.legs) != moved:
+                diffs.append(f"{move}: commit objective {objective!r} legs {list(employee.legs)}"
+                             f" != {reference.cost!r} {moved}")
+            for name in FIELDS[1:]:
+                field, value = getattr(employee.state, name), getattr(reference, name)
+                if field != value or type(field) is not type(value):
+                    diffs.append(f"{move}: commit {name}={field!r} != State.evaluate {value!r}")
+        else:
+            employee.rollback()
+            if list(employee.legs) != legs:
+                diffs.append(f"{move}: rollback changed the legs")
+    return diffs
+
+
+def check_screen(instance, solution_file: Path, tier_counts: dict) -> list:
+    """Shifts flagged by the screen of validate_fast but feasible; adds the
+    verdict's tiers to tier_counts."""
+    validator = Validator(instance, solution_file, evaluate=False)
+    # Two coverage violations at most, then one per shift: never stops early.
+    verdict = validator.validate_fast(len(validator.solution.employees) + 2)
+    for tier, count in verdict["tiers"].items():
+        tier_counts[tier] += count
+    legs = {employee.name: employee.legs for employee in validator.solution.employees}
+    return [f"{violation['employee']}: screen {violation['check']} {violation['value']} > {violation['limit']}"
+            f" but evaluate feasible"
+            for violation in verdict["violations"]
+            if violation["check"] in TIERS and evaluate_shift(legs[violation["employee"]], instance)[1]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Evaluation kernel vs State.evaluate parity check.")
+    parser.add_argument("--only", default=None, help="Check a single instance name.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the probed moves.")
+    parser.add_argument("--moves", type=int, default=20, help="Scored moves per solution.")
+    parser.add_argument("--probes", type=int, default=50, help="Probed moves per solution.")
+    parser.add_argument("--verbose", action="store_true", help="Also print passing solutions.")
+    args = parser.parse_args()
+
+    names = sorted(p.stem for p in SOLUTIONS_DIR.glob("*.csv"))
+    if args.only:
+        names = [n for n in names if n == args.only]
+    if not names:
+        print("No solution files matched.", file=sys.stderr)
+        return 2
+
+    failures = 0
+    tier_counts = dict.fromkeys(TIERS, 0)
+    for name in names:
+        instance = Instance.from_json(str(DOWNLOADS_INSTANCES_DIR / f"{name}.json"))
+        solution = Solution.from_file(instance, SOLUTIONS_DIR / f"{name}.csv")
+        diffs = check_parity(solution)
+        diffs += check_screen(instance, SOLUTIONS_DIR / f"{name}.csv", tier_counts)
+        diffs += check_moves(solution, random.Random(f"{args.seed}:{name}"), args.moves)
+        # Last, as the committed probes modify the solution.
+        diffs += check_probes(solution, random.Random(f"{args.seed}:{name}"), args.probes)
+        if diffs:
+            failures += 1
+            print(f"FAIL {name}")
+            for d in diffs[:MAX_DIFFS_PER_INSTANCE]:
+                print(f"  {d}")
+            if len(diffs) > MAX_DIFFS_PER_INSTANCE:
+                print(f"  ... and {len(diffs) - MAX_DIFFS_PER_INSTANCE} more")
+        elif args.verbose:
+            print(f"PASS {name} ({len(solution.employees)} employees)")
+
+    print("Screened shifts: " + ", ".join(f"{tier} {count}" for tier, count in tier_counts.items()))
+    print(f"Kernel parity: {len(names) - failures}/{len(names)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
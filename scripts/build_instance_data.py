@@ -10,14 +10,34 @@ Reads from four sources:
 
 Usage:
     python scripts/build_instance_data.py
+    python scripts/build_instance_data.py --jobs 8   # instances across 8 processes
+    python scripts/build_instance_data.py --full     # recompute every instance
+
+With --jobs N (0: one per CPU), process_instance and compute_solution_breakdown
+run across a process pool; the entries are merged and sorted in the main
+process exactly as in the serial build, so the output files are identical.
+The time of each stage is printed at the end.
+
+The build is incremental: scripts/data/build_manifest.json records a
+fingerprint of the inputs of every instance (instance JSON files, seed
+summary.csv files, BKS CSV and PATAT rows, solution file, ledger entry).
+Only the instances whose fingerprint changed are recomputed; the others
+are kept from the existing data/instances.json. A change of this script,
+of the validator sources or of the instance-generator sources (the classes
+package), a missing manifest or --full recomputes everything.
 
 Requires: numpy, pandas, sortedcontainers
 Also requires the instance-generator package to be importable (add to sys.path).
 """
 
+import argparse
 import csv
+import hashlib
 import json
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
@@ -26,6 +46,7 @@ import numpy as np
 INSTANCE_GENERATOR_DIR = Path.home() / "instance-generator"
 sys.path.insert(0, str(INSTANCE_GENERATOR_DIR))
 
+import classes
 from classes.instance import Instance
 
 # Add bdsp-validator to path for solution validation
@@ -48,6 +69,9 @@ PATAT_CSV = REPO_ROOT / "scripts" / "data" / "metadata_paper.csv"
 SOLUTIONS_DIR = REPO_ROOT / "sols"
 DOWNLOADS_INSTANCES_DIR = REPO_ROOT / "downloads" / "instances"
 OUTPUT_FILE = REPO_ROOT / "data" / "instances.json"
+MANIFEST_FILE = REPO_ROOT / "scripts" / "data" / "build_manifest.json"
+# Bump when the manifest layout or the fingerprinted inputs change.
+MANIFEST_VERSION = 1
 
 # Instance sizes (for reference)
 REALISTIC_INSTANCES = [
@@ -495,7 +519,122 @@ def compute_solution_breakdown(instance_name: str) -> dict | None:
         return None
 
 
-def build():
+# ---------------------------------------------------------------------------
+# Build manifest (input fingerprints of every instance)
+# ---------------------------------------------------------------------------
+
+def file_digest(path: Path) -> str | None:
+    """sha256 of the content of a file, None if it does not exist."""
+    if not path.is_file():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def code_fingerprint() -> str:
+    """Fingerprint of the code computing the entries: this script, the
+    validator sources used by compute_solution_breakdown and the sources of
+    the instance-generator package (classes) used by process_instance, from
+    wherever it was imported."""
+    script = Path(__file__).resolve()
+    sources = {f"scripts/{script.name}": script}
+    for source in sorted((VALIDATOR_DIR / "data").glob("*.py")):
+        sources[f"bdsp-validator/data/{source.name}"] = source
+    for package_dir in map(Path, classes.__path__):
+        for source in sorted(package_dir.rglob("*.py")):
+            sources[f"classes/{source.relative_to(package_dir).as_posix()}"] = source
+    digests = {name: file_digest(source) for name, source in sources.items()}
+    return hashlib.sha256(json.dumps(digests, sort_keys=True).encode()).hexdigest()
+
+
+def instance_fingerprint(instance_name, bks_data, patat_data, accepted_ledger) -> str:
+    """Fingerprint of every input of the entry of an instance: instance JSON
+    files, seed summary.csv files, BKS CSV row, PATAT row, solution file and
+    ledger entry."""
+    instance_dir = RESULTS_DIR / instance_name
+    summaries = {
+        str(summary_file.relative_to(instance_dir)): file_digest(summary_file)
+        for summary_file in sorted(instance_dir.glob("algo_*/*/summary.csv"))
+    } if instance_dir.exists() else {}
+    inputs = {
+        "instance_json": file_digest(get_json_path(instance_name)),
+        "validator_json": file_digest(DOWNLOADS_INSTANCES_DIR / f"{instance_name}.json"),
+        "summaries": summaries,
+        "bks": bks_data.get(instance_name),
+        "patat": patat_data.get(instance_name),
+        "solution": file_digest(SOLUTIONS_DIR / f"{instance_name}.csv"),
+        "ledger": accepted_ledger.get(instance_name),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def read_previous_build(code: str) -> tuple[dict, dict]:
+    """Entries of the existing OUTPUT_FILE and fingerprints of the manifest,
+    keyed by instance name; both empty if the manifest is missing, of another
+    version or of another code fingerprint."""
+    if not MANIFEST_FILE.exists() or not OUTPUT_FILE.exists():
+        return {}, {}
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+        entries = json.loads(OUTPUT_FILE.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"WARNING: Cannot read the previous build ({e}), rebuilding everything")
+        return {}, {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("code") != code:
+        print("Build code changed since the previous build, rebuilding everything")
+        return {}, {}
+    return {entry["name"]: entry for entry in entries}, manifest.get("instances", {})
+
+
+# ---------------------------------------------------------------------------
+# Per-instance work (serial or across a process pool)
+# ---------------------------------------------------------------------------
+
+def build_entry(instance_name, bks_data, patat_data):
+    """process_instance and compute_solution_breakdown of one instance.
+
+    Returns (entry, breakdown, seconds), seconds being the time of each of
+    the two stages, keyed by stage name.
+    """
+    start = time.perf_counter()
+    entry = process_instance(instance_name, bks_data, patat_data)
+    processed = time.perf_counter()
+    breakdown = compute_solution_breakdown(instance_name)
+    return entry, breakdown, {
+        "process_instance": processed - start,
+        "compute_solution_breakdown": time.perf_counter() - processed,
+    }
+
+
+# (bks_data, patat_data) of a pool worker, set once by _init_worker instead
+# of being pickled with every instance.
+_worker_inputs = None
+
+
+def _init_worker(bks_data, patat_data):
+    global _worker_inputs
+    _worker_inputs = (bks_data, patat_data)
+
+
+def _build_entry_worker(instance_name):
+    return build_entry(instance_name, *_worker_inputs)
+
+
+def build_entries(instance_names, bks_data, patat_data, jobs=1):
+    """build_entry of every instance, in the order of instance_names.
+
+    With jobs > 1 the instances are processed across a pool of jobs
+    processes; the results still come back in input order.
+    """
+    if jobs <= 1:
+        return [build_entry(name, bks_data, patat_data) for name in instance_names]
+    chunksize = max(1, len(instance_names) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(bks_data, patat_data)) as pool:
+        return list(pool.map(_build_entry_worker, instance_names, chunksize=chunksize))
+
+
+def build(jobs=1, full=False):
+    timings = {}
+    start = time.perf_counter()
     print("Reading BKS CSVs...")
     bks_data = read_bks_csvs()
 
@@ -509,7 +648,6 @@ def build():
     print(f"Total unique instances: {len(all_instance_names)}")
 
     instances = []
-    breakdown_count = 0
 
     # Accepted community submissions (written by scripts/apply_submission.py via
     # the GitHub Actions workflow). Folding them in here keeps a community best
@@ -523,14 +661,38 @@ def build():
         except Exception:
             accepted_ledger = {}
 
-    for instance_name in all_instance_names:
-        entry = process_instance(instance_name, bks_data, patat_data)
+    timings["read inputs"] = time.perf_counter() - start
 
-        # Compute solution breakdown for instances with BKS solutions
-        breakdown = compute_solution_breakdown(instance_name)
+    # Instances whose inputs changed since the previous build
+    start = time.perf_counter()
+    code = code_fingerprint()
+    previous_entries, previous_fingerprints = ({}, {}) if full else read_previous_build(code)
+    fingerprints = {
+        name: instance_fingerprint(name, bks_data, patat_data, accepted_ledger)
+        for name in all_instance_names
+    }
+    changed = [
+        name for name in all_instance_names
+        if name not in previous_entries or previous_fingerprints.get(name) != fingerprints[name]
+    ]
+    timings["fingerprint"] = time.perf_counter() - start
+    print(f"Recomputing {len(changed)} of {len(all_instance_names)} instances")
+
+    # Features, algorithm results and solution breakdown of the changed instances
+    start = time.perf_counter()
+    results = dict(zip(changed, build_entries(changed, bks_data, patat_data, jobs)))
+    timings["instances (wall)"] = time.perf_counter() - start
+    for stage in ("process_instance", "compute_solution_breakdown"):
+        timings[f"  {stage} (sum)"] = sum(seconds[stage] for _, _, seconds in results.values())
+
+    start = time.perf_counter()
+    for instance_name in all_instance_names:
+        if instance_name not in results:
+            instances.append(previous_entries[instance_name])
+            continue
+        entry, breakdown, _ = results[instance_name]
         if breakdown is not None:
             entry["solution_breakdown"] = breakdown
-            breakdown_count += 1
 
         # Keep an accepted community BKS (published via the submission workflow).
         led = accepted_ledger.get(instance_name)
@@ -560,8 +722,11 @@ def build():
         return (source, size, trail)
 
     instances.sort(key=sort_key)
+    breakdown_count = sum(1 for i in instances if "solution_breakdown" in i)
+    timings["merge and sort"] = time.perf_counter() - start
 
     # Write output
+    start = time.perf_counter()
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, "w") as f:
         json.dump(instances, f, indent=2)
@@ -573,6 +738,12 @@ def build():
         json.dump(instances, f, indent=2)
         f.write(";\n")
 
+    # Written last, so that an interrupted build is not taken as up to date
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_FILE, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "code": code, "instances": fingerprints}, f, indent=2)
+    timings["write"] = time.perf_counter() - start
+
     print(f"\nDone! Wrote {len(instances)} instances to {OUTPUT_FILE} and {js_file}")
 
     # Summary
@@ -582,9 +753,19 @@ def build():
         s = i.get("source", "unknown")
         sources[s] = sources.get(s, 0) + 1
     print(f"  Optimal: {optimal}, Open: {len(instances) - optimal}")
+    print(f"  Recomputed: {len(changed)}, kept: {len(instances) - len(changed)}")
     print(f"  Solution breakdowns: {breakdown_count}")
     print(f"  Sources: {sources}")
+    print(f"  Stage times ({jobs} job{'s' if jobs > 1 else ''}):")
+    for stage, seconds in timings.items():
+        print(f"    {stage:<34} {seconds:8.2f}s")
 
 
 if __name__ == "__main__":
-    build()
+    parser = argparse.ArgumentParser(description="Build data/instances.json for the BDSP website")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Processes for the per-instance work (default 1: serial, 0: one per CPU)")
+    parser.add_argument("--full", action="store_true",
+                        help="Recompute every instance, ignoring the build manifest")
+    args = parser.parse_args()
+    build(args.jobs if args.jobs > 0 else os.cpu_count() or 1, args.full)
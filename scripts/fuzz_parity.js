@@ -9,9 +9,13 @@
  * implementations, and requires exact agreement on every field. It also
  * asserts that every penalty branch was actually triggered at least once.
  *
+ * The Python reference is one persistent `py_eval_batch.py --serve` worker:
+ * mutants are streamed to it inline (no files) while the JS side evaluates
+ * them, and it keeps its parsed instances across all the --rounds.
+ *
  * Usage:
  *   node scripts/fuzz_parity.js [--seed 42] [--per-instance 12]
- *                               [--max-legs 800] [--all]
+ *                               [--rounds 1] [--max-legs 800] [--all]
  *                               [--python-bin <bin>] [--keep-failures]
  *
  * Exit code 0 = all mutants agree and all penalty buckets are non-empty.
@@ -21,7 +25,8 @@
 const fs = require('fs');
 const os = require('os');
 const path = require('path');
-const { spawnSync } = require('child_process');
+const readline = require('readline');
+const { spawn } = require('child_process');
 
 const REPO = path.resolve(__dirname, '..');
 const core = require(path.join(REPO, 'js', 'bdsp_validator_core.js'));
@@ -32,12 +37,13 @@ const core = require(path.join(REPO, 'js', 'bdsp_validator_core.js'));
 
 const argv = process.argv.slice(2);
 const opts = {
-  seed: 42, perInstance: 12, maxLegs: 800, all: false,
+  seed: 42, perInstance: 12, rounds: 1, maxLegs: 800, all: false,
   pythonBin: null, keepFailures: false,
 };
 for (let i = 0; i < argv.length; i++) {
   if (argv[i] === '--seed') opts.seed = parseInt(argv[++i], 10);
   else if (argv[i] === '--per-instance') opts.perInstance = parseInt(argv[++i], 10);
+  else if (argv[i] === '--rounds') opts.rounds = parseInt(argv[++i], 10);
   else if (argv[i] === '--max-legs') opts.maxLegs = parseInt(argv[++i], 10);
   else if (argv[i] === '--all') opts.all = true;
   else if (argv[i] === '--python-bin') opts.pythonBin = argv[++i];
@@ -160,7 +166,7 @@ function assignmentToCsv(assignment, numLegs) {
 }
 
 // ---------------------------------------------------------------------------
-// Build mutants
+// Instances and their base assignments
 // ---------------------------------------------------------------------------
 
 const names = fs.readdirSync(path.join(REPO, 'sols'))
@@ -168,9 +174,7 @@ const names = fs.readdirSync(path.join(REPO, 'sols'))
   .map(function (f) { return f.replace(/\.csv$/, ''); })
   .sort();
 
-const tmp = fs.mkdtempSync(path.join(os.tmpdir(), 'bdsp-fuzz-'));
-const failDir = path.join(tmp, 'failures');
-const jobs = [];        // {id, instance, solution, name, trace}
+const bases = [];       // {name, instPath, base}
 const instances = {};   // name -> parsed instance
 
 let skipped = 0;
@@ -183,29 +187,46 @@ names.forEach(function (name) {
 
   const csvText = fs.readFileSync(path.join(REPO, 'sols', name + '.csv'), 'utf8');
   const employees = core.parseSolution(csvText, instance);
-  const base = employees.map(function (emp) {
-    return emp.legs.map(function (leg) { return leg.sortedIdx; });
+  bases.push({
+    name: name,
+    instPath: instPath,
+    base: employees.map(function (emp) {
+      return emp.legs.map(function (leg) { return leg.sortedIdx; });
+    }),
   });
+});
 
-  const mutants = [];
-  for (let m = 0; m < opts.perInstance; m++) mutants.push(mutate(base));
-  mutants.push(mutateDup(base));
-  mutants.push(mutateDrop(base));
-
-  mutants.forEach(function (mut, m) {
-    const id = name + '#' + m + '(' + mut.trace + ')';
-    const solPath = path.join(tmp, name + '_m' + m + '.csv');
-    fs.writeFileSync(solPath, assignmentToCsv(mut.assignment, instance.legs.length));
-    jobs.push({ id: id, instance: instPath, solution: solPath, name: name, trace: mut.trace });
+/** The mutants of one round: {id, instance, csv, name, trace}. */
+function buildJobs(round) {
+  const jobs = [];
+  const prefix = opts.rounds > 1 ? 'r' + round + ':' : '';
+  bases.forEach(function (b) {
+    const mutants = [];
+    for (let m = 0; m < opts.perInstance; m++) mutants.push(mutate(b.base));
+    mutants.push(mutateDup(b.base));
+    mutants.push(mutateDrop(b.base));
+
+    mutants.forEach(function (mut, m) {
+      jobs.push({
+        id: prefix + b.name + '#' + m + '(' + mut.trace + ')',
+        instance: b.instPath,
+        csv: assignmentToCsv(mut.assignment, instances[b.name].legs.length),
+        name: b.name,
+        file: prefix.replace(':', '_') + b.name + '_m' + m + '.csv',
+        trace: mut.trace,
+      });
+    });
   });
-});
+  return jobs;
+}
 
 if (skipped) {
   console.log('Skipped ' + skipped + ' instance(s) with more than ' + opts.maxLegs +
     ' legs (use --all to include them).');
 }
-console.log('Fuzzing ' + Object.keys(instances).length + ' instances, ' +
-  jobs.length + ' mutants (seed ' + opts.seed + ')');
+const perRound = bases.length * (opts.perInstance + 2);
+console.log('Fuzzing ' + bases.length + ' instances, ' + perRound * opts.rounds + ' mutants' +
+  (opts.rounds > 1 ? ' in ' + opts.rounds + ' rounds' : '') + ' (seed ' + opts.seed + ')');
 
 // ---------------------------------------------------------------------------
 // JS evaluation + penalty branch tally
@@ -222,55 +243,90 @@ const BUCKETS = {
 const bucketCounts = {};
 Object.keys(BUCKETS).forEach(function (k) { bucketCounts[k] = 0; });
 
-const jsResults = {}; // id -> {result}
-jobs.forEach(function (job) {
+function evaluateJs(job) {
   const instance = instances[job.name];
-  const employees = core.parseSolution(fs.readFileSync(job.solution, 'utf8'), instance);
+  const employees = core.parseSolution(job.csv, instance);
   const result = core.evaluateSolution(instance, employees);
   result.legCheck = core.validateLegs(instance, employees);
-  jsResults[job.id] = result;
   result.evaluated.forEach(function (ev) {
     Object.keys(BUCKETS).forEach(function (k) {
       if (BUCKETS[k](ev.state)) bucketCounts[k]++;
     });
   });
-});
+  return result;
+}
+
+/**
+ * evaluateJs over the jobs, yielding to the event loop after each one, so
+ * that the jobs queued for the Python worker are written to its stdin and
+ * its results are read while the JS side evaluates (a plain jobs.map would
+ * hold both until the last job).
+ */
+async function evaluateAllJs(jobs) {
+  const results = [];
+  for (let j = 0; j < jobs.length; j++) {
+    results.push(evaluateJs(jobs[j]));
+    await new Promise(setImmediate);
+  }
+  return results;
+}
 
 // ---------------------------------------------------------------------------
-// Python reference run (single batch)
+// Python reference worker (py_eval_batch.py --serve)
 // ---------------------------------------------------------------------------
 
-function runPythonBatch(jobList, pythonBin) {
-  const manifest = path.join(tmp, 'manifest.jsonl');
-  const outFile = path.join(tmp, 'out.jsonl');
-  fs.writeFileSync(manifest, jobList.map(function (j) {
-    return JSON.stringify({ id: j.id, instance: j.instance, solution: j.solution });
-  }).join('\n') + '\n');
-
-  const candidates = pythonBin ? [pythonBin] : ['python', 'py'];
-  let lastError = null;
-  for (let c = 0; c < candidates.length; c++) {
-    const parts = candidates[c].split(' ');
+/** Spawn one worker; resolves once it printed {"ready": true}. */
+function spawnWorker(command) {
+  return new Promise(function (resolve, reject) {
+    const parts = command.split(' ');
     const args = parts.slice(1).concat(
-      [path.join(REPO, 'scripts', 'py_eval_batch.py'), manifest, outFile]);
-    const proc = spawnSync(parts[0], args, { stdio: ['ignore', 'inherit', 'inherit'] });
-    if (proc.error) { lastError = proc.error.message; continue; }
-    if (proc.status !== 0) { lastError = 'exit code ' + proc.status; continue; }
-    const results = {};
-    fs.readFileSync(outFile, 'utf8').split('\n').forEach(function (line) {
+      [path.join(REPO, 'scripts', 'py_eval_batch.py'), '--serve']);
+    const proc = spawn(parts[0], args, { stdio: ['pipe', 'pipe', 'inherit'] });
+    const waiting = {}; // job id -> resolve
+    let ready = false;
+    const worker = {
+      /** Send one job; resolves with its result line. */
+      submit: function (job) {
+        return new Promise(function (done) {
+          waiting[job.id] = done;
+          proc.stdin.write(JSON.stringify(job) + '\n');
+        });
+      },
+      close: function () { proc.stdin.end(); },
+    };
+    proc.on('error', function (err) { if (!ready) reject(err); });
+    proc.on('exit', function (code) {
+      if (!ready) { reject(new Error('exit code ' + code)); return; }
+      Object.keys(waiting).forEach(function (id) {
+        waiting[id]({ id: id, error: 'Python worker exited (code ' + code + ')' });
+        delete waiting[id];
+      });
+    });
+    readline.createInterface({ input: proc.stdout }).on('line', function (line) {
       if (!line.trim()) return;
       const rec = JSON.parse(line);
-      results[rec.id] = rec;
+      if (rec.ready) { ready = true; resolve(worker); return; }
+      const done = waiting[rec.id];
+      delete waiting[rec.id];
+      if (done) done(rec);
     });
-    return results;
+  });
+}
+
+async function startPython(pythonBin) {
+  const candidates = pythonBin ? [pythonBin] : ['python', 'py'];
+  let lastError = null;
+  for (let c = 0; c < candidates.length; c++) {
+    try {
+      return await spawnWorker(candidates[c]);
+    } catch (err) {
+      lastError = err.message;
+    }
   }
   throw new Error('Python reference run failed (' + lastError +
     '). Is sortedcontainers installed? Try --python-bin.');
 }
 
-console.log('Running Python reference on ' + jobs.length + ' mutants…');
-const pyResults = runPythonBatch(jobs, opts.pythonBin);
-
 // ---------------------------------------------------------------------------
 // Compare
 // ---------------------------------------------------------------------------
@@ -281,74 +337,106 @@ const COMPARE_FIELDS = [
   'drive_penalty', 'rest_penalty', 'work_time', 'unpaid', 'upmax', 'num_legs',
 ];
 
-let failures = 0;
-jobs.forEach(function (job) {
+function compare(js, py) {
   const diffs = [];
-  const js = jsResults[job.id];
-  const py = pyResults[job.id];
-  if (!py) {
-    diffs.push('missing Python result');
+  if (py.error) {
+    diffs.push('Python error: ' + py.error);
+    return diffs;
+  }
+  if (js.totalCost !== py.total) diffs.push('total: js=' + js.totalCost + ' py=' + py.total);
+  if (js.allFeasible !== py.feasible) diffs.push('feasible: js=' + js.allFeasible + ' py=' + py.feasible);
+  const jsCovered = js.legCheck.unassigned.length === 0 && js.legCheck.duplicates.length === 0;
+  if (jsCovered !== py.covered) {
+    diffs.push('covered: js=' + jsCovered + ' py=' + py.covered);
+  }
+  if (js.legCheck.unassigned.length !== py.unassigned) {
+    diffs.push('unassigned: js=' + js.legCheck.unassigned.length + ' py=' + py.unassigned);
+  }
+  if (js.legCheck.duplicates.length !== py.duplicates) {
+    diffs.push('duplicates: js=' + js.legCheck.duplicates.length + ' py=' + py.duplicates);
+  }
+  if (js.evaluated.length !== py.num_employees) {
+    diffs.push('num_employees: js=' + js.evaluated.length + ' py=' + py.num_employees);
   } else {
-    if (js.totalCost !== py.total) diffs.push('total: js=' + js.totalCost + ' py=' + py.total);
-    if (js.allFeasible !== py.feasible) diffs.push('feasible: js=' + js.allFeasible + ' py=' + py.feasible);
-    const jsCovered = js.legCheck.unassigned.length === 0 && js.legCheck.duplicates.length === 0;
-    if (jsCovered !== py.covered) {
-      diffs.push('covered: js=' + jsCovered + ' py=' + py.covered);
-    }
-    if (js.legCheck.unassigned.length !== py.unassigned) {
-      diffs.push('unassigned: js=' + js.legCheck.unassigned.length + ' py=' + py.unassigned);
-    }
-    if (js.legCheck.duplicates.length !== py.duplicates) {
-      diffs.push('duplicates: js=' + js.legCheck.duplicates.length + ' py=' + py.duplicates);
-    }
-    if (js.evaluated.length !== py.num_employees) {
-      diffs.push('num_employees: js=' + js.evaluated.length + ' py=' + py.num_employees);
-    } else {
-      js.evaluated.forEach(function (ev, i) {
-        const ref = py.employees[i];
-        if (ev.state.feasible !== ref.feasible) {
-          diffs.push(ev.emp.name + '.feasible: js=' + ev.state.feasible + ' py=' + ref.feasible);
+    js.evaluated.forEach(function (ev, i) {
+      const ref = py.employees[i];
+      if (ev.state.feasible !== ref.feasible) {
+        diffs.push(ev.emp.name + '.feasible: js=' + ev.state.feasible + ' py=' + ref.feasible);
+      }
+      COMPARE_FIELDS.forEach(function (f) {
+        if (ev.state[f] !== ref[f]) {
+          diffs.push(ev.emp.name + '.' + f + ': js=' + ev.state[f] + ' py=' + ref[f]);
         }
-        COMPARE_FIELDS.forEach(function (f) {
-          if (ev.state[f] !== ref[f]) {
-            diffs.push(ev.emp.name + '.' + f + ': js=' + ev.state[f] + ' py=' + ref[f]);
-          }
-        });
       });
-    }
+    });
   }
+  return diffs;
+}
 
-  if (diffs.length) {
-    failures++;
-    console.log('FAIL ' + job.id);
-    diffs.slice(0, 8).forEach(function (d) { console.log('  ' + d); });
-    if (diffs.length > 8) console.log('  ... and ' + (diffs.length - 8) + ' more');
-    if (opts.keepFailures) {
-      if (!fs.existsSync(failDir)) fs.mkdirSync(failDir);
-      fs.copyFileSync(job.solution, path.join(failDir, path.basename(job.solution)));
-    }
+let failDir = null;
+let failures = 0;
+let total = 0;
+
+async function fuzz() {
+  const worker = await startPython(opts.pythonBin);
+  const start = Date.now();
+  for (let round = 0; round < opts.rounds; round++) {
+    const jobs = buildJobs(round);
+    total += jobs.length;
+    // Stream every mutant to Python first, so both sides evaluate at once.
+    const pending = jobs.map(function (job) {
+      return worker.submit({ id: job.id, instance: job.instance, solution_data: job.csv });
+    });
+    const jsResults = await evaluateAllJs(jobs);
+    const pyResults = await Promise.all(pending);
+
+    jobs.forEach(function (job, j) {
+      const diffs = compare(jsResults[j], pyResults[j]);
+      if (!diffs.length) return;
+      failures++;
+      console.log('FAIL ' + job.id);
+      diffs.slice(0, 8).forEach(function (d) { console.log('  ' + d); });
+      if (diffs.length > 8) console.log('  ... and ' + (diffs.length - 8) + ' more');
+      if (opts.keepFailures) {
+        if (!failDir) failDir = fs.mkdtempSync(path.join(os.tmpdir(), 'bdsp-fuzz-'));
+        fs.writeFileSync(path.join(failDir, job.file), job.csv);
+      }
+    });
   }
-});
+  worker.close();
+  const seconds = (Date.now() - start) / 1000;
+  console.log('Evaluated ' + total + ' mutants in ' + seconds.toFixed(2) + 's (' +
+    (total / seconds).toFixed(1) + ' mutants/s, JS and Python)');
+}
 
 // ---------------------------------------------------------------------------
 // Report
 // ---------------------------------------------------------------------------
 
-console.log('\nPenalty branch coverage (employee evaluations that triggered each branch):');
-let emptyBuckets = 0;
-Object.keys(bucketCounts).forEach(function (k) {
-  const flag = bucketCounts[k] === 0 ? '  <-- NEVER TRIGGERED' : '';
-  if (bucketCounts[k] === 0) emptyBuckets++;
-  console.log('  ' + k + ': ' + bucketCounts[k] + flag);
-});
+async function main() {
+  await fuzz();
 
-console.log('\n' + (jobs.length - failures) + '/' + jobs.length + ' mutants agree');
-if (failures && opts.keepFailures) {
-  console.log('Failing mutant CSVs kept in ' + failDir);
-}
-if (emptyBuckets) {
-  console.log('ERROR: ' + emptyBuckets + ' penalty branch(es) never triggered — ' +
-    'increase --per-instance or adjust operators.');
+  console.log('\nPenalty branch coverage (employee evaluations that triggered each branch):');
+  let emptyBuckets = 0;
+  Object.keys(bucketCounts).forEach(function (k) {
+    const flag = bucketCounts[k] === 0 ? '  <-- NEVER TRIGGERED' : '';
+    if (bucketCounts[k] === 0) emptyBuckets++;
+    console.log('  ' + k + ': ' + bucketCounts[k] + flag);
+  });
+
+  console.log('\n' + (total - failures) + '/' + total + ' mutants agree');
+  if (failures && opts.keepFailures) {
+    console.log('Failing mutant CSVs kept in ' + failDir);
+  }
+  if (emptyBuckets) {
+    console.log('ERROR: ' + emptyBuckets + ' penalty branch(es) never triggered — ' +
+      'increase --per-instance or adjust operators.');
+  }
+
+  process.exit(failures || emptyBuckets ? 1 : 0);
 }
 
-process.exit(failures || emptyBuckets ? 1 : 0);
+main().catch(function (err) {
+  console.error(err.message);
+  process.exit(1);
+});
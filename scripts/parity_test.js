@@ -12,7 +12,7 @@
  * penalty internals. Exact numeric equality, zero tolerance.
  *
  * Usage:
- *   node scripts/parity_test.js [--python] [--python-bin <bin>]
+ *   node scripts/parity_test.js [--python] [--python-bin <bin>] [--workers N]
  *                               [--only <name>] [--verbose]
  *
  * Exit code 0 = all pass, 1 = any mismatch.
@@ -32,10 +32,11 @@ const core = require(path.join(REPO, 'js', 'bdsp_validator_core.js'));
 // ---------------------------------------------------------------------------
 
 const argv = process.argv.slice(2);
-const opts = { python: false, pythonBin: null, only: null, verbose: false };
+const opts = { python: false, pythonBin: null, workers: 1, only: null, verbose: false };
 for (let i = 0; i < argv.length; i++) {
   if (argv[i] === '--python') opts.python = true;
   else if (argv[i] === '--python-bin') opts.pythonBin = argv[++i];
+  else if (argv[i] === '--workers') opts.workers = parseInt(argv[++i], 10);
   else if (argv[i] === '--only') opts.only = argv[++i];
   else if (argv[i] === '--verbose') opts.verbose = true;
   else {
@@ -220,7 +221,7 @@ if (bksMismatches.length) {
 // Phase B: JS core vs live Python reference
 // ---------------------------------------------------------------------------
 
-function runPythonBatch(jobs, pythonBin) {
+function runPythonBatch(jobs, pythonBin, workers) {
   const tmp = fs.mkdtempSync(path.join(os.tmpdir(), 'bdsp-parity-'));
   const manifest = path.join(tmp, 'manifest.jsonl');
   const outFile = path.join(tmp, 'out.jsonl');
@@ -232,7 +233,7 @@ function runPythonBatch(jobs, pythonBin) {
   for (let c = 0; c < candidates.length; c++) {
     const parts = candidates[c].split(' ');
     const args = parts.slice(1).concat(
-      [path.join(REPO, 'scripts', 'py_eval_batch.py'), manifest, outFile]);
+      [path.join(REPO, 'scripts', 'py_eval_batch.py'), manifest, outFile, '--workers', String(workers)]);
     const proc = spawnSync(parts[0], args, { stdio: ['ignore', 'inherit', 'inherit'] });
     if (proc.error) { lastError = proc.error.message; continue; }
     if (proc.status !== 0) { lastError = 'exit code ' + proc.status; continue; }
@@ -290,7 +291,7 @@ if (opts.python) {
     });
 
   console.log('Phase B: JS core vs Python reference (' + jobs.length + ' instances)');
-  const pyResults = runPythonBatch(jobs, opts.pythonBin);
+  const pyResults = runPythonBatch(jobs, opts.pythonBin, opts.workers);
 
   let pyFailures = 0;
   jobs.forEach(function (job) {
@@ -9,15 +9,31 @@ reference implementation. A single process evaluates many
 Usage:
     python scripts/py_eval_batch.py <manifest.jsonl> <out.jsonl>
 
+    # Same output, evaluated by 4 processes:
+    python scripts/py_eval_batch.py <manifest.jsonl> <out.jsonl> --workers 4
+
+    # Persistent worker: manifest lines on stdin, output lines on stdout.
+    python scripts/py_eval_batch.py --serve
+
 Each manifest line:
     {"id": "...", "instance": "<path to instance .json>",
      "solution": "<path to solution .csv>"}
+or, with the solution inline (dense CSV or sparse text):
+    {"id": "...", "instance": "...", "solution_data": "0,1,0\\n1,0,1\\n"}
+
+With --serve, the worker first prints {"ready": true}, then one output
+line per job as soon as it is evaluated (a failed job gives
+{"id": "...", "error": "..."}, a malformed line {"id": null, "error": "..."}),
+until stdin is closed. Instances stay
+cached for the lifetime of the worker.
 
 Each output line (same order as the manifest):
     {"id": "...", "total": <number>, "feasible": <bool>, "covered": <bool>,
      "unassigned": <int>, "duplicates": <int>, "num_employees": <int>,
      "employees": [{...}]}
 
+The number of jobs and jobs per second are printed on stderr.
+
 Values are emitted raw (ints, or floats that JSON-normalize to the same
 number in JS); the Node side compares with strict numeric equality.
 
@@ -27,7 +43,8 @@ Requires: sortedcontainers (pip install sortedcontainers).
 import json
 import logging
 import sys
-from collections import Counter
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -71,55 +88,135 @@ def employee_record(e) -> dict:
     }
 
 
-def evaluate_pair(instance, solution_path: Path) -> dict:
-    solution = Solution.from_file(instance, solution_path)
+def evaluate_pair(instance, solution: Solution) -> dict:
     solution.evaluate()
 
-    counts = Counter()
-    for employee in solution.employees:
-        for leg in employee.legs:
-            counts[leg.id] += 1
-    unassigned = sum(1 for leg in instance.legs if counts[leg.id] == 0)
-    duplicates = sum(1 for leg in instance.legs if counts[leg.id] > 1)
+    coverage = solution.coverage()
 
     return {
         "total": solution.value,
         "feasible": bool(solution.feasible),
-        "covered": unassigned == 0 and duplicates == 0,
-        "unassigned": unassigned,
-        "duplicates": duplicates,
+        "covered": coverage.covered,
+        "unassigned": coverage.unassigned,
+        "duplicates": coverage.duplicates,
         "num_employees": len(solution.employees),
         "employees": [employee_record(e) for e in solution.employees],
     }
 
 
-def main() -> int:
-    if len(sys.argv) != 3:
-        print(__doc__, file=sys.stderr)
-        return 2
+def load_instance(instances: dict, inst_path: str):
+    """Instance at inst_path, parsed once and kept in instances (by path)."""
+    if inst_path not in instances:
+        instance = Instance.from_json(str(inst_path))
+        # from_json derives the name by splitting on '/', which is
+        # wrong for Windows paths; the name is cosmetic, fix it anyway.
+        instance.name = Path(inst_path).stem
+        instances[inst_path] = instance
+    return instances[inst_path]
+
+
+def evaluate_job(instances: dict, job: dict) -> dict:
+    """Result line of one manifest job, the solution read from "solution"
+    (a path) or "solution_data" (the content, dense or sparse)."""
+    instance = load_instance(instances, job["instance"])
+    if "solution_data" in job:
+        data = job["solution_data"].encode()
+    else:
+        data = Path(job["solution"]).read_bytes()
+    result = {"id": job["id"]}
+    result.update(evaluate_pair(instance, Solution.from_bytes(instance, data)))
+    return result
+
+
+def serve(instances: dict) -> int:
+    """--serve: one job per stdin line, one result per stdout line, written
+    as soon as the job is done. A job that fails, or a line that is not a
+    JSON job, gives {"id", "error"} (id null if unknown) instead of
+    stopping the worker."""
+    sys.stdout.write(json.dumps({"ready": True}) + "\n")
+    sys.stdout.flush()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = None
+        try:
+            job = json.loads(line)
+            result = evaluate_job(instances, job)
+        except Exception as exc:
+            job_id = job.get("id") if isinstance(job, dict) else None
+            result = {"id": job_id, "error": f"{type(exc).__name__}: {exc}"}
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+# instance path -> Instance, in each process of --workers
+WORKER_INSTANCES = {}
 
-    manifest_path = Path(sys.argv[1])
-    out_path = Path(sys.argv[2])
 
+def evaluate_chunk(chunk: list) -> list:
+    """(manifest index, output line) of jobs of one instance, in a pool process."""
+    return [(index, json.dumps(evaluate_job(WORKER_INSTANCES, job))) for index, job in chunk]
+
+
+def evaluate_parallel(jobs: list, workers: int, out) -> None:
+    """Evaluate the jobs in a pool of workers processes, writing the output
+    lines in manifest order.
+
+    The jobs are grouped by instance, so each instance is parsed by only
+    one process (an instance with more than len(jobs) / workers jobs is
+    split in chunks, parsed by a few). Chunks are submitted largest first;
+    lines are buffered until all the lines before them are written.
+    """
+    groups = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault(job["instance"], []).append((index, job))
+    size = max(1, -(-len(jobs) // workers))
+    chunks = [group[start:start + size] for group in groups.values()
+              for start in range(0, len(group), size)]
+    chunks.sort(key=len, reverse=True)
+
+    done = {}
+    next_index = 0
+    with ProcessPoolExecutor(workers) as pool:
+        for future in as_completed([pool.submit(evaluate_chunk, chunk) for chunk in chunks]):
+            done.update(future.result())
+            while next_index in done:
+                out.write(done.pop(next_index) + "\n")
+                next_index += 1
+
+
+def main() -> int:
     instances = {}  # instance path -> Instance (fuzzing reuses instances)
 
-    with manifest_path.open("r", encoding="utf-8") as manifest, \
-            out_path.open("w", encoding="utf-8") as out:
-        for line in manifest:
-            line = line.strip()
-            if not line:
-                continue
-            job = json.loads(line)
-            inst_path = job["instance"]
-            if inst_path not in instances:
-                instance = Instance.from_json(str(inst_path))
-                # from_json derives the name by splitting on '/', which is
-                # wrong for Windows paths; the name is cosmetic, fix it anyway.
-                instance.name = Path(inst_path).stem
-                instances[inst_path] = instance
-            result = {"id": job["id"]}
-            result.update(evaluate_pair(instances[inst_path], Path(job["solution"])))
-            out.write(json.dumps(result) + "\n")
+    args = sys.argv[1:]
+    workers = 1
+    if "--workers" in args:
+        at = args.index("--workers")
+        workers = int(args[at + 1]) if at + 1 < len(args) and args[at + 1].isdigit() else 0
+        del args[at:at + 2]
+    if args == ["--serve"] and workers == 1:
+        return serve(instances)
+    if len(args) != 2 or workers < 1:
+        print(__doc__, file=sys.stderr)
+        return 2
+
+    manifest_path = Path(args[0])
+    out_path = Path(args[1])
+
+    start = time.perf_counter()
+    with manifest_path.open("r", encoding="utf-8") as manifest:
+        jobs = [json.loads(line) for line in manifest if line.strip()]
+    with out_path.open("w", encoding="utf-8") as out:
+        if workers > 1:
+            evaluate_parallel(jobs, workers, out)
+        else:
+            for job in jobs:
+                out.write(json.dumps(evaluate_job(instances, job)) + "\n")
+    seconds = time.perf_counter() - start
+    print(f"py_eval_batch: {len(jobs)} jobs in {seconds:.2f}s "
+          f"({len(jobs) / seconds if seconds else 0:.1f} jobs/s, {workers} worker(s))", file=sys.stderr)
 
     return 0
 
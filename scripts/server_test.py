@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Offline test of the validation server (bdsp-validator/server.py).
+
+Drives ValidationService.handle directly, without any socket, with the
+solutions validated in a thread (jobs=0):
+
+    * POST /validate of every sols/<name>.csv (or --only <name>), of a
+      mutant with one leg unassigned and of a malformed body must give the
+      same result dict as scripts/apply_submission.py process_submission
+      (dry run) on the same file;
+    * unknown and malformed instance names, unknown endpoints and wrong
+      methods must give their error;
+    * GET /health and GET /metrics must answer, the metrics counting every
+      request made;
+    * requests with a malformed or negative Content-Length, fed to
+      serve_connection through an in-memory stream, must get a 400 response.
+
+Usage:
+    python scripts/server_test.py [--only <name>] [--verbose]
+
+Exit code 0 = all checks pass, 1 = any failure.
+
+Requires: sortedcontainers (pip install sortedcontainers).
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VALIDATOR_DIR = REPO_ROOT / "bdsp-validator"
+SOLUTIONS_DIR = REPO_ROOT / "sols"
+DOWNLOADS_INSTANCES_DIR = REPO_ROOT / "downloads" / "instances"
+INSTANCES_JSON = REPO_ROOT / "data" / "instances.json"
+
+sys.path.insert(0, str(VALIDATOR_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from apply_submission import process_submission  # noqa: E402  (sets validator.logger)
+from server import ValidationService  # noqa: E402
+
+
+def unassign_first_leg(data: bytes) -> bytes:
+    """The dense matrix with the first leg of its first row unassigned."""
+    lines = data.splitlines(keepends=True)
+    lines[0] = lines[0].replace(b"1", b"0", 1)
+    return b"".join(lines)
+
+
+class RecordingWriter:
+    """Stand-in for the asyncio.StreamWriter of serve_connection, keeping what is written."""
+
+    def __init__(self) -> None:
+        self.data = b""
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+async def raw_request(service: ValidationService, request: bytes) -> bytes:
+    """Response of serve_connection to the raw bytes of a request."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(request)
+    reader.feed_eof()
+    writer = RecordingWriter()
+    await service.serve_connection(reader, writer)
+    return writer.data
+
+
+async def run_checks(names: list, verbose: bool) -> list:
+    """Failure messages of the checks (empty if all pass)."""
+    failures = []
+    requests = {"/validate": 0, "/health": 0, "/metrics": 0, "other": 0}
+    service = ValidationService(DOWNLOADS_INSTANCES_DIR, INSTANCES_JSON, jobs=0)
+
+    async def request(method, target, body=b"", endpoint="/validate"):
+        requests[endpoint] += 1
+        return await service.handle(method, target, body)
+
+    def expect(label, condition, detail=""):
+        if not condition:
+            failures.append(f"{label}: {detail}")
+        elif verbose:
+            print(f"PASS {label}")
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for name in names:
+                data = (SOLUTIONS_DIR / f"{name}.csv").read_bytes()
+                for kind, body in (("archived", data), ("unassigned", unassign_first_leg(data)),
+                                   ("malformed", b"0,1,x\n")):
+                    path = Path(directory) / f"{name}.csv"
+                    path.write_bytes(body)
+                    expected = process_submission(path, author="tester")
+                    status, result = await request("POST", f"/validate?instance={name}&author=tester", body)
+                    expect(f"{name} {kind}", status == 200 and result == expected,
+                           f"status {status}, server {result} != process_submission {expected}")
+                    if kind == "archived":
+                        expect(f"{name} archived is valid",
+                               result.get("status") in ("accepted", "valid_no_improvement"),
+                               f"status {result.get('status')}")
+
+        status, result = await request("POST", "/validate?instance=realistic_0_0", b"1\n")
+        expect("unknown instance", status == 200 and result["status"] == "error"
+               and result["message"] == "Unknown instance 'realistic_0_0'.", f"{status} {result}")
+        status, result = await request("POST", "/validate?instance=../etc", b"1\n")
+        expect("malformed instance name", status == 400, f"{status} {result}")
+        status, result = await request("GET", "/validate?instance=realistic_10_1")
+        expect("wrong method", status == 405, f"{status} {result}")
+        status, result = await request("GET", "/nowhere", endpoint="other")
+        expect("unknown endpoint", status == 404, f"{status} {result}")
+
+        for label, length in (("malformed Content-Length", b"abc"), ("negative Content-Length", b"-5")):
+            response = await raw_request(service, b"POST /validate?instance=realistic_10_1 HTTP/1.1\r\n"
+                                                  b"Content-Length: " + length + b"\r\n\r\n1\n")
+            expect(label, response.startswith(b"HTTP/1.1 400 "), f"{response[:60]!r}")
+
+        status, result = await request("GET", "/health", endpoint="/health")
+        expect("health", status == 200 and result["status"] == "ok" and result["jobs"] == 0, f"{status} {result}")
+        status, result = await request("GET", "/metrics", endpoint="/metrics")
+        # The /metrics request is recorded after its response is computed.
+        counted = {endpoint: entry["requests"] for endpoint, entry in result.items()}
+        requests["/metrics"] -= 1
+        expect("metrics", status == 200 and counted == {e: n for e, n in requests.items() if n},
+               f"{status} {counted} != {requests}")
+        expect("metrics fields", all({"mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"} <= set(entry)
+                                     for entry in result.values()), f"{result}")
+    finally:
+        service.close()
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline test of the validation server.")
+    parser.add_argument("--only", default=None, help="Validate a single instance name.")
+    parser.add_argument("--verbose", action="store_true", help="Also print passing checks.")
+    args = parser.parse_args()
+
+    names = sorted(p.stem for p in SOLUTIONS_DIR.glob("*.csv"))
+    if args.only:
+        names = [n for n in names if n == args.only]
+    if not names:
+        print("No solution files matched.", file=sys.stderr)
+        return 2
+
+    # The validator logs every verdict; only the checks are of interest here.
+    logging.disable(logging.CRITICAL)
+    failures = asyncio.run(run_checks(names, args.verbose))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"Server test: {'all checks passed' if not failures else f'{len(failures)} failure(s)'}"
+          f" ({len(names)} solutions)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())